@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Benchmark JSON encoding and wire size of a large /api/status payload.
+
+Builds a /api/status list for synthetic services with get_service_status()
+itself, fed process records from this host, and compares FastAPI's default path (jsonable_encoder + json.dumps) with
+the server's dumps_json, using orjson when it is installed and the stdlib
+fallback otherwise, then reports the body size raw, gzipped and, if
+brotli is installed, brotli-compressed.
+
+Usage: python bench_encoding.py [service_count] [iterations]
+"""
+
+import gzip
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+REPO_DIR = Path(__file__).resolve().parent
+
+
+def build_statuses(server, count: int, rng: random.Random):
+    """Real get_service_status() output for synthetic services.
+
+    Running services get one to four process records produced by
+    _proc_record() from processes on this host, so every record has the
+    exact shape and field types the server sends.
+    """
+    import psutil
+    procs = []
+    for proc in psutil.process_iter():
+        try:
+            with proc.oneshot():
+                procs.append(server._proc_record(proc))
+        except psutil.Error:
+            continue
+    snapshot = server.ProcessSnapshot([])
+    listeners = server.get_listener_index()
+    statuses = []
+    for i in range(count):
+        ports = [8000 + i] if rng.random() < 0.8 else []
+        svc = server.ServiceConfig(
+            name=f"service-{i}",
+            kind=rng.choice(["backend", "frontend", "other"]),
+            start_cmd=f"python -m app.service{i} --port {8000 + i}",
+            match_keywords=[f"app.service{i}"],
+            ports=ports,
+            api_url=f"http://localhost:{8000 + i}" if ports else None,
+            description=f"Synthetic service {i}",
+        )
+        server.runtime_tracker[svc.name] = server.ServiceRuntime(svc.name)
+        running = bool(procs) and rng.random() < 0.7
+        snapshot.matches[svc.name] = rng.sample(procs, rng.randint(1, min(4, len(procs)))) if running else []
+        statuses.append(server.get_service_status(svc, snapshot, listeners))
+    return statuses
+
+
+def time_it(fn, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    iterations = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    # Import the server from a scratch directory so it creates no files in the repo
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        sys.path.insert(0, str(REPO_DIR))
+        from fastapi.encoders import jsonable_encoder
+        import server
+        statuses = build_statuses(server, count, random.Random(42))
+
+        def fastapi_default():
+            return json.dumps(jsonable_encoder(statuses), ensure_ascii=False, allow_nan=False,
+                              indent=None, separators=(",", ":")).encode("utf-8")
+
+        results = [("fastapi default", time_it(fastapi_default, iterations), len(fastapi_default()))]
+        orjson, server.orjson = server.orjson, None
+        results.append(("dumps_json (stdlib)", time_it(lambda: server.dumps_json(statuses), iterations),
+                        len(server.dumps_json(statuses))))
+        server.orjson = orjson
+        if orjson is not None:
+            results.append(("dumps_json (orjson)", time_it(lambda: server.dumps_json(statuses), iterations),
+                            len(server.dumps_json(statuses))))
+
+        body = server.dumps_json(statuses)
+        sizes = [("raw", len(body), 0.0),
+                 ("gzip -6", len(gzip.compress(body, 6)), time_it(lambda: gzip.compress(body, 6), 20))]
+        if server.brotli is not None:
+            sizes.append(("brotli q5", len(server.brotli.compress(body, quality=5)),
+                          time_it(lambda: server.brotli.compress(body, quality=5), 20)))
+
+        # WebSocket resync frame: re-encoding the whole frame vs splicing the cached statuses
+        sampler = server.StatusSampler()
+        sampler.statuses, sampler.encoded = statuses, server.EncodedJSON.of(statuses)
+        sampler.encoded.text
+        frame_old = time_it(lambda: json.dumps({"type": "status_update", "seq": 1, "data": statuses},
+                                               separators=(",", ":")), iterations)
+        frame_new = time_it(sampler.full_frame, iterations)
+
+    print("=" * 64)
+    print(f"Status payload: {count} services, {len(body) / 1024:.1f} KB encoded")
+    print("=" * 64)
+    print(f"{'encoder':<24}{'encode':>14}{'bytes':>12}")
+    for label, seconds, size in results:
+        print(f"{label:<24}{seconds * 1000:>11.3f} ms{size:>12}")
+    print("-" * 64)
+    print(f"{'wire encoding':<24}{'compress':>14}{'bytes':>12}")
+    for label, size, seconds in sizes:
+        print(f"{label:<24}{seconds * 1000:>11.3f} ms{size:>12}")
+    print("-" * 64)
+    print(f"{'ws full frame':<24}{'per frame':>14}")
+    print(f"{'json.dumps frame':<24}{frame_old * 1000:>11.3f} ms")
+    print(f"{'spliced cached JSON':<24}{frame_new * 1000:>11.3f} ms")
+    print("=" * 64)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Benchmark the psutil and /proc process scanners on a synthetic process table.
+
+Builds a fake procfs tree (stat, statm and cmdline for each PID) in a
+temporary directory, points both scanners at it and times a cold scan
+(empty caches) and warm scans (steady state). Linux only.
+
+Usage: python bench_process_scan.py [process_count] [service_count]
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+REPO_DIR = Path(__file__).resolve().parent
+
+WORDS = [
+    "python", "node", "java", "-jar", "/usr/bin/env", "--port", "gunicorn", "worker",
+    "celery", "redis-server", "postgres", "nginx", "-c", "/etc/app/config.yml", "--host",
+    "0.0.0.0", "systemd", "bash", "npm", "start", "serve", "app.py", "manage.py",
+]
+
+
+def read_btime() -> str:
+    with open("/proc/stat") as f:
+        for line in f:
+            if line.startswith("btime"):
+                return line.split()[1]
+    return str(int(time.time()) - 3600)
+
+
+def build_proc_tree(root: Path, count: int, services: int, rng: random.Random):
+    """Write a procfs-like tree; roughly one process in 50 belongs to a service"""
+    (root / "stat").write_text(f"cpu  1 0 1 1 0 0 0 0 0 0\nbtime {read_btime()}\n")
+    for pid in range(1000, 1000 + count):
+        d = root / str(pid)
+        d.mkdir()
+        args = [rng.choice(WORDS) for _ in range(rng.randint(2, 12))]
+        if rng.random() < 0.02:
+            args.append(f"svc-{rng.randrange(services)}-marker")
+        comm = args[0].rsplit("/", 1)[-1][:15]
+        utime, stime = rng.randint(0, 10_000), rng.randint(0, 5_000)
+        rss = rng.randint(100, 50_000)
+        fields = ["S", "1", str(pid), str(pid), "0", "-1", "4194560", "0", "0", "0", "0",
+                  str(utime), str(stime), "0", "0", "20", "0", "1", "0",
+                  str(rng.randint(100, 100_000)), str(rss * 4096), str(rss)] + ["0"] * 30
+        (d / "stat").write_text(f"{pid} ({comm}) {' '.join(fields)}\n")
+        (d / "statm").write_text(f"{rss * 2} {rss} 100 10 0 {rss} 0\n")
+        (d / "cmdline").write_bytes(b"\0".join(a.encode() for a in args) + b"\0")
+
+
+def time_scans(server, scanner, index, warm_runs: int):
+    server.CMDLINE_CACHE = server.CmdlineCache()
+    server.PROCESS_CACHE = server.ProcessCache()
+    start = time.perf_counter()
+    matched = len(scanner.scan(index))
+    cold = time.perf_counter() - start
+    start = time.perf_counter()
+    for _ in range(warm_runs):
+        scanner.scan(index)
+    warm = (time.perf_counter() - start) / warm_runs
+    return cold, warm, matched
+
+
+def main():
+    if not sys.platform.startswith("linux"):
+        print("The /proc scanner is Linux-only; nothing to compare on this platform.")
+        return 1
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    services = int(sys.argv[2]) if len(sys.argv) > 2 else 40
+    rng = random.Random(42)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        proc_root = Path(tmp) / "proc"
+        proc_root.mkdir()
+        print(f"Building synthetic process table: {count} processes, {services} services...")
+        build_proc_tree(proc_root, count, services, rng)
+
+        # Import the server from a scratch directory so it creates no files in the repo
+        workdir = Path(tmp) / "work"
+        workdir.mkdir()
+        os.chdir(workdir)
+        sys.path.insert(0, str(REPO_DIR))
+        import psutil
+        import server
+
+        svc_list = [
+            server.ServiceConfig(name=f"svc-{i}", kind="backend", start_cmd="true",
+                                 match_keywords=[f"svc-{i}-marker"])
+            for i in range(services)
+        ]
+        index = server.KeywordIndex(svc_list)
+
+        psutil.PROCFS_PATH = str(proc_root)
+        results = {
+            "psutil": time_scans(server, server.PsutilScanner(), index, warm_runs=5),
+            "procfs": time_scans(server, server.ProcfsScanner(str(proc_root)), index, warm_runs=5),
+        }
+
+    print("=" * 60)
+    print(f"{'scanner':<10}{'cold scan':>14}{'warm scan':>14}{'matched':>10}")
+    for name, (cold, warm, matched) in results.items():
+        print(f"{name:<10}{cold * 1000:>11.1f} ms{warm * 1000:>11.1f} ms{matched:>10}")
+    speedup = results["psutil"][1] / results["procfs"][1] if results["procfs"][1] else float("inf")
+    print("=" * 60)
+    print(f"Warm-scan speedup of procfs over psutil: {speedup:.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
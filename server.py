@@ -4,22 +4,43 @@ FastAPI backend with comprehensive settings, port management, and monitoring
 """
 
 import asyncio
+import gzip
+import hashlib
+import itertools
 import json
+import math
+import os
+import signal
 import socket
+import sqlite3
 import subprocess
 import sys
+import threading
 import time
-from dataclasses import asdict, dataclass, field
-from datetime import datetime
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import AsyncExitStack, asynccontextmanager
+from dataclasses import asdict, dataclass, field, is_dataclass
+from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, AsyncIterator, Callable, Dict, FrozenSet, List, Optional, Set, Tuple
+from urllib.parse import urlparse
 import uuid
+from array import array
 
 import psutil
 import uvicorn
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException
+try:
+    import brotli  # optional: adds br variants of the dashboard and large JSON responses
+except ImportError:
+    brotli = None
+try:
+    import orjson  # optional: faster JSON encoding for large responses and WebSocket frames
+except ImportError:
+    orjson = None
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, Response, StreamingResponse
 from pydantic import BaseModel
 
 # Encoding helper
@@ -55,6 +76,9 @@ class ServerSettings:
     default_tailscale_domain: str = ""
     update_interval_seconds: int = 5
     api_base_url: str = "http://localhost:8765"
+    port_check_mode: str = "listeners"  # "listeners" (socket table) or "connect" (TCP probe)
+    probe_deadline_seconds: float = 2.0  # total budget for remote/Tailscale probes
+    process_scanner: str = "psutil"  # "psutil" (portable) or "procfs" (Linux fast path)
     
     def to_dict(self) -> Dict[str, Any]:
         return asdict(self)
@@ -70,6 +94,9 @@ class SettingsUpdate(BaseModel):
     default_tailscale_domain: Optional[str] = None
     update_interval_seconds: Optional[int] = None
     api_base_url: Optional[str] = None
+    port_check_mode: Optional[str] = None
+    probe_deadline_seconds: Optional[float] = None
+    process_scanner: Optional[str] = None
 
 
 class ServiceAdd(BaseModel):
@@ -112,6 +139,19 @@ class ServerNode:
         return asdict(self)
 
 
+@dataclass
+class ManagedProcess:
+    """A process spawned by the manager, identified by pid and create_time."""
+    service_name: str
+    pid: int
+    create_time: float
+    pgid: Optional[int] = None  # process group (POSIX session leader / Windows group)
+    started_at: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
 class ServerRegisterModel(BaseModel):
     name: str
     host: str
@@ -177,22 +217,177 @@ class ServiceRuntime:
         return {
             "uptime": self.get_uptime(),
             "start_time": self.start_time.isoformat() if self.start_time else None,
+            "started_at": self.start_time.timestamp() if self.start_time else None,
             "errors": self.errors[-3:],  # Last 3 errors for display
             "restart_count": self.restart_count,
             "last_error": self.last_error
         }
 
 
+def finite_metric(value: Any) -> Optional[float]:
+    """A metric value as a finite float; None for non-numbers, bools, NaN and infinities"""
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return None
+    try:
+        value = float(value)
+    except OverflowError:
+        return None
+    return value if math.isfinite(value) else None
+
+
+class MetricRing:
+    """Fixed-capacity ring buffer of heartbeat samples, one array column per metric.
+
+    Timestamps are float epoch seconds and every numeric metric lives in its
+    own array('d'), so an append is O(1) and a sample costs 8 bytes per
+    metric. Missing values are NaN. Non-numeric metrics are not kept in
+    history (they remain available in ServerNode.last_metrics).
+    """
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.ts = array('d', bytes(8 * capacity))
+        self.columns: Dict[str, array] = {}
+        self.start = 0
+        self.size = 0
+
+    def append(self, ts: float, metrics: Dict[str, Any]):
+        if self.size < self.capacity:
+            idx = (self.start + self.size) % self.capacity
+            self.size += 1
+        else:
+            idx = self.start
+            self.start = (self.start + 1) % self.capacity
+        self.ts[idx] = ts
+        for name, column in self.columns.items():
+            column[idx] = math.nan
+        for name, value in metrics.items():
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                continue
+            column = self.columns.get(name)
+            if column is None:
+                column = self.columns[name] = array('d', [math.nan]) * self.capacity
+            column[idx] = value
+
+    def __len__(self) -> int:
+        return self.size
+
+    def _indices(self) -> List[int]:
+        return [(self.start + i) % self.capacity for i in range(self.size)]
+
+    def to_columns(self) -> Dict[str, List[Optional[float]]]:
+        """Oldest-first columns; NaN gaps become None"""
+        indices = self._indices()
+        columns: Dict[str, List[Optional[float]]] = {"ts": [self.ts[i] for i in indices]}
+        for name, column in self.columns.items():
+            columns[name] = [None if math.isnan(column[i]) else column[i] for i in indices]
+        return columns
+
+    def to_records(self) -> List[Dict[str, Any]]:
+        """Oldest-first samples in the original {"ts": iso, metric: value} shape"""
+        records = []
+        for i in self._indices():
+            record: Dict[str, Any] = {"ts": datetime.utcfromtimestamp(self.ts[i]).isoformat()}
+            for name, column in self.columns.items():
+                value = column[i]
+                if not math.isnan(value):
+                    record[name] = value
+            records.append(record)
+        return records
+
+
 # Global runtime tracker
 runtime_tracker: Dict[str, ServiceRuntime] = {}
 ENROLLED_SERVERS: Dict[str, ServerNode] = {}
-SERVER_HISTORY: Dict[str, List[Dict[str, Any]]] = {}  # bounded metrics history per server
+SERVER_HISTORY: Dict[str, MetricRing] = {}  # bounded metrics history per server
 SERVER_HISTORY_MAX = 200
 
 # ------------------------------------------------------------
 # Configuration Loading & Management
 # ------------------------------------------------------------
 
+def write_json_atomic(path: Path, payload: Any):
+    """Write JSON to a temp file, fsync it and rename it over ``path``"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with open(tmp, "w", encoding=DEFAULT_ENCODING) as f:
+        f.write(json.dumps(payload, indent=2))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    if hasattr(os, "O_DIRECTORY"):
+        try:
+            dir_fd = os.open(str(path.parent), os.O_RDONLY | os.O_DIRECTORY)
+        except OSError:
+            return
+        try:
+            os.fsync(dir_fd)  # make the rename itself durable
+        finally:
+            os.close(dir_fd)
+
+
+class WriteBehindStore:
+    """Debounced, atomic, off-loop writes of the JSON config files.
+
+    ``schedule`` marks a file dirty; the document is rendered on the event
+    loop when its timer fires (so it sees a consistent state) and written
+    by a single-thread executor, which keeps writes to one file in order.
+    Mutations before the timer fires coalesce into that one write, and a
+    later call can only bring the deadline forward. Outside an event loop
+    the write happens immediately.
+    """
+    DEBOUNCE_SECONDS = 0.5
+
+    def __init__(self):
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="persist")
+        self._pending: Dict[Path, Tuple[Callable[[], Any], float, asyncio.TimerHandle]] = {}
+        self._writes: Set[asyncio.Future] = set()
+        self.flushes = 0
+
+    def schedule(self, path: Path, render: Callable[[], Any], delay: Optional[float] = None):
+        delay = self.DEBOUNCE_SECONDS if delay is None else delay
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            write_json_atomic(path, render())
+            return
+        due = loop.time() + delay
+        pending = self._pending.get(path)
+        if pending is not None:
+            _, pending_due, handle = pending
+            if pending_due <= due:
+                self._pending[path] = (render, pending_due, handle)
+                return
+            handle.cancel()
+        self._pending[path] = (render, due, loop.call_later(delay, self._write, path))
+
+    def _write(self, path: Path):
+        render, _, _ = self._pending.pop(path)
+        write = asyncio.get_running_loop().run_in_executor(self._executor, write_json_atomic, path, render())
+        write.add_done_callback(self._written)
+        self._writes.add(write)
+
+    def _written(self, write: asyncio.Future):
+        self._writes.discard(write)
+        self.flushes += 1
+        if not write.cancelled() and write.exception() is not None:
+            print(f"Persistence error: {write.exception()}")
+
+    async def flush(self):
+        """Write everything that is pending now and wait for it (used on shutdown)"""
+        for path in list(self._pending):
+            self._pending[path][2].cancel()
+            self._write(path)
+        if self._writes:
+            await asyncio.gather(*self._writes, return_exceptions=True)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"pending": len(self._pending), "in_flight": len(self._writes), "flushes": self.flushes}
+
+
+PERSISTENCE = WriteBehindStore()
+SERVERS_PERSIST_DELAY = 30.0  # heartbeat-only changes (last_seen/last_metrics) are persisted at most this often
+
+
 def load_services() -> List[ServiceConfig]:
     """Load services from config file"""
     config_file = Path("services_config.json")
@@ -212,7 +407,7 @@ def load_services() -> List[ServiceConfig]:
             }
         ]
         
-        config_file.write_text(json.dumps(default_services, indent=2), encoding=DEFAULT_ENCODING)
+        write_json_atomic(config_file, default_services)
         services = [ServiceConfig(**s) for s in default_services]
     else:
         services_data = json.loads(config_file.read_text(encoding=DEFAULT_ENCODING))
@@ -226,9 +421,8 @@ def load_services() -> List[ServiceConfig]:
 
 
 def save_services(services: List[ServiceConfig]):
-    """Save services to config file"""
-    config_file = Path("services_config.json")
-    config_file.write_text(json.dumps([s.to_dict() for s in services], indent=2), encoding=DEFAULT_ENCODING)
+    """Save services to config file (write-behind)"""
+    PERSISTENCE.schedule(Path("services_config.json"), lambda: [s.to_dict() for s in services])
 
 
 def load_settings() -> ServerSettings:
@@ -250,7 +444,7 @@ def load_settings() -> ServerSettings:
             update_interval_seconds=5,
             api_base_url="http://localhost:8765"
         )
-        settings_file.write_text(json.dumps(settings.to_dict(), indent=2), encoding=DEFAULT_ENCODING)
+        write_json_atomic(settings_file, settings.to_dict())
         return settings
     
     settings_data = json.loads(settings_file.read_text(encoding=DEFAULT_ENCODING))
@@ -258,16 +452,16 @@ def load_settings() -> ServerSettings:
 
 
 def save_settings(settings: ServerSettings):
-    """Save settings to file"""
-    settings_file = Path("settings.json")
-    settings_file.write_text(json.dumps(settings.to_dict(), indent=2), encoding=DEFAULT_ENCODING)
+    """Save settings to file (write-behind); every settings mutation saves, so this bumps its version"""
+    SETTINGS_RESOURCE.bump()
+    PERSISTENCE.schedule(Path("settings.json"), settings.to_dict)
 
 
 def load_servers() -> Dict[str, ServerNode]:
     """Load enrolled servers from servers.json (static fields)."""
     servers_file = Path("servers.json")
     if not servers_file.exists():
-        servers_file.write_text(json.dumps([], indent=2), encoding=DEFAULT_ENCODING)
+        write_json_atomic(servers_file, [])
         return {}
     try:
         data = json.loads(servers_file.read_text(encoding=DEFAULT_ENCODING))
@@ -282,14 +476,146 @@ def load_servers() -> Dict[str, ServerNode]:
         return {}
 
 
-def save_servers():
-    """Persist current enrolled servers (excluding history)."""
-    servers_file = Path("servers.json")
-    payload = [srv.to_dict() for srv in ENROLLED_SERVERS.values()]
-    servers_file.write_text(json.dumps(payload, indent=2), encoding=DEFAULT_ENCODING)
+def save_servers(delay: Optional[float] = None):
+    """Persist current enrolled servers (excluding history), write-behind. Bumps the servers version."""
+    SERVERS_RESOURCE.bump()
+    PERSISTENCE.schedule(
+        Path("servers.json"), lambda: [srv.to_dict() for srv in ENROLLED_SERVERS.values()], delay
+    )
+
+
+class ServiceRegistry:
+    """The configured services, indexed by name, kind and port.
+
+    Iterates in configuration order like the list it replaces. Mutations
+    swap in a new list rather than editing it in place, so a status scan
+    iterating in a worker thread never sees a half-applied change. Ports
+    claimed by more than one service are tracked as they are added and
+    removed, so the conflict report does not rebuild a port map.
+    """
+    def __init__(self, services: List[ServiceConfig]):
+        self.reload(services)
+
+    def reload(self, services: List[ServiceConfig]):
+        """Replace every service and rebuild all indexes"""
+        self._items: List[ServiceConfig] = []
+        self._by_name: Dict[str, ServiceConfig] = {}
+        self._by_kind: Dict[str, Dict[str, ServiceConfig]] = {}
+        self._by_port: Dict[int, Dict[str, ServiceConfig]] = {}
+        self._conflicts: Set[int] = set()
+        items = []
+        for svc in services:
+            if svc.name in self._by_name:
+                continue
+            self._index(svc)
+            items.append(svc)
+        self._items = items
+
+    def _index(self, svc: ServiceConfig):
+        self._by_name[svc.name] = svc
+        self._by_kind.setdefault(svc.kind.lower(), {})[svc.name] = svc
+        for port in svc.ports:
+            owners = self._by_port.setdefault(port, {})
+            owners[svc.name] = svc
+            if len(owners) > 1:
+                self._conflicts.add(port)
+
+    def _unindex(self, svc: ServiceConfig):
+        del self._by_name[svc.name]
+        kind = self._by_kind[svc.kind.lower()]
+        del kind[svc.name]
+        if not kind:
+            del self._by_kind[svc.kind.lower()]
+        for port in svc.ports:
+            owners = self._by_port[port]
+            owners.pop(svc.name, None)
+            if len(owners) < 2:
+                self._conflicts.discard(port)
+            if not owners:
+                del self._by_port[port]
+
+    def add(self, svc: ServiceConfig):
+        if svc.name in self._by_name:
+            raise ValueError(f"Service name '{svc.name}' already exists")
+        self._index(svc)
+        self._items = self._items + [svc]
+
+    def remove(self, name: str) -> Optional[ServiceConfig]:
+        svc = self._by_name.get(name)
+        if svc is None:
+            return None
+        self._unindex(svc)
+        self._items = [s for s in self._items if s is not svc]
+        return svc
+
+    def get(self, name: str) -> Optional[ServiceConfig]:
+        return self._by_name.get(name)
+
+    def by_kind(self, kind: str) -> List[ServiceConfig]:
+        return list(self._by_kind.get(kind.lower(), {}).values())
+
+    def by_port(self, port: int) -> List[str]:
+        """Names of the services configured on ``port``"""
+        return list(self._by_port.get(port, ()))
+
+    def ports(self) -> List[int]:
+        return sorted(self._by_port)
+
+    def port_conflicts(self) -> Dict[int, List[str]]:
+        return {port: list(self._by_port[port]) for port in sorted(self._conflicts)}
 
+    def __contains__(self, name: str) -> bool:
+        return name in self._by_name
 
-SERVICES = load_services()
+    def __iter__(self):
+        return iter(self._items)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+
+class TaskIndex:
+    """Position of each scheduled task in SETTINGS.scheduled_tasks by name.
+
+    Rebuilt whenever the list object is swapped (a settings update replaces
+    it wholesale); appends and in-place updates keep it current, and only a
+    delete has to renumber the tasks after it.
+    """
+    def __init__(self):
+        self._tasks: Optional[List[Dict[str, Any]]] = None
+        self._positions: Dict[str, int] = {}
+
+    def _current(self) -> Dict[str, int]:
+        tasks = SETTINGS.scheduled_tasks
+        if tasks is not self._tasks or len(tasks) != len(self._positions):
+            self._tasks = tasks
+            self._positions = {}
+            for i, task in enumerate(tasks):
+                self._positions.setdefault(task.get("name"), i)
+        return self._positions
+
+    def find(self, name: str) -> int:
+        return self._current().get(name, -1)
+
+    def append(self, task: Dict[str, Any]):
+        positions = self._current()
+        SETTINGS.scheduled_tasks.append(task)
+        positions[task.get("name")] = len(SETTINGS.scheduled_tasks) - 1
+
+    def replace(self, idx: int, task: Dict[str, Any]):
+        positions = self._current()
+        positions.pop(SETTINGS.scheduled_tasks[idx].get("name"), None)
+        SETTINGS.scheduled_tasks[idx] = task
+        positions[task.get("name")] = idx
+
+    def pop(self, idx: int) -> Dict[str, Any]:
+        self._current()
+        task = SETTINGS.scheduled_tasks.pop(idx)
+        self._tasks = None  # later positions shifted
+        return task
+
+
+SERVICES = ServiceRegistry(load_services())
 SETTINGS = load_settings()
 ENROLLED_SERVERS = load_servers()
 
@@ -297,8 +623,83 @@ ENROLLED_SERVERS = load_servers()
 # Port Management & Validation
 # ------------------------------------------------------------
 
-def is_port_in_use(port: int) -> bool:
+LISTENER_INDEX_MAX_AGE = 1.0  # seconds the listener table is reused outside a refresh cycle
+
+
+class ListenerIndex:
+    """Listening TCP/UDP sockets by pid and by port, from one system-wide call.
+
+    psutil.net_connections() parses the socket tables once instead of once
+    per process. Where it needs privileges we do not have (macOS), the index
+    is marked incomplete and falls back to per-process lookups.
+    """
+    def __init__(self):
+        self.taken_at = time.monotonic()
+        self.by_pid: Dict[int, List[int]] = {}
+        self.by_port: Dict[int, Set[int]] = {}
+        self.complete = True
+        try:
+            connections = psutil.net_connections(kind='inet')
+        except (psutil.AccessDenied, OSError):
+            self.complete = False
+            return
+        for conn in connections:
+            if conn.status != psutil.CONN_LISTEN or not conn.laddr:
+                continue
+            port = conn.laddr.port
+            owners = self.by_port.setdefault(port, set())
+            # pid is None for sockets of other users' processes
+            if conn.pid is not None:
+                owners.add(conn.pid)
+                ports = self.by_pid.setdefault(conn.pid, [])
+                if port not in ports:
+                    ports.append(port)
+
+    def ports_for(self, pid: int) -> List[int]:
+        """Ports a process listens on"""
+        if self.complete:
+            return list(self.by_pid.get(pid, []))
+        ports = []
+        try:
+            for conn in psutil.Process(pid).connections():
+                if conn.status == psutil.CONN_LISTEN and conn.laddr and conn.laddr.port not in ports:
+                    ports.append(conn.laddr.port)
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            pass
+        return ports
+
+    def is_listening(self, port: int) -> Optional[bool]:
+        """Whether anything listens on port; None when the index cannot tell"""
+        if not self.complete:
+            return None
+        return port in self.by_port
+
+    def owners(self, port: int) -> List[int]:
+        return sorted(self.by_port.get(port, ()))
+
+
+_listener_index: Optional[ListenerIndex] = None
+
+
+def get_listener_index(refresh: bool = False) -> ListenerIndex:
+    """Return the shared listener index, rebuilding it when stale or when asked to"""
+    global _listener_index
+    index = _listener_index
+    if refresh or index is None or time.monotonic() - index.taken_at > LISTENER_INDEX_MAX_AGE:
+        index = _listener_index = ListenerIndex()
+    return index
+
+
+PORT_CHECK_MODES = ("listeners", "connect")
+LOCAL_HOSTS = {"localhost", "127.0.0.1", "::1", "0.0.0.0", ""}
+
+
+def is_port_in_use(port: int, listeners: Optional[ListenerIndex] = None) -> bool:
     """Check if a port is currently in use"""
+    if SETTINGS.port_check_mode == "listeners":
+        listening = (listeners or get_listener_index()).is_listening(port)
+        if listening is not None:
+            return listening
     try:
         with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
             s.settimeout(0.5)
@@ -308,54 +709,95 @@ def is_port_in_use(port: int) -> bool:
         return False
 
 
-def get_port_conflicts(services: List[ServiceConfig]) -> Dict[int, List[str]]:
-    """Find port conflicts between services"""
-    port_usage = {}
-    for svc in services:
-        for port in svc.ports:
-            if port not in port_usage:
-                port_usage[port] = []
-            port_usage[port].append(svc.name)
-    
-    return {port: svcs for port, svcs in port_usage.items() if len(svcs) > 1}
+def service_probe_targets(svc: ServiceConfig) -> List[Tuple[str, int]]:
+    """Remote endpoints of a service that can only be checked with a probe"""
+    targets: List[Tuple[str, int]] = []
+    for url in (svc.api_url, svc.tailscale_url):
+        if not url:
+            continue
+        try:
+            parsed = urlparse(url)
+            port = parsed.port or (443 if parsed.scheme in ("https", "wss") else 80)
+        except ValueError:
+            continue
+        host = parsed.hostname or ""
+        if host.lower() not in LOCAL_HOSTS and not host.startswith("127."):
+            targets.append((host, port))
+    domain = SETTINGS.default_tailscale_domain.strip()
+    if domain:
+        targets.extend((domain, port) for port in svc.ports)
+    return list(dict.fromkeys(targets))
 
 
-def scan_service_for_ports(svc: ServiceConfig) -> List[int]:
-    """Scan running service processes to detect ports they're using"""
+async def probe_port(host: str, port: int, timeout: float) -> bool:
+    """Open (and immediately close) a TCP connection without blocking the loop"""
+    try:
+        _, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+    except (OSError, asyncio.TimeoutError):
+        return False
+    writer.close()
+    try:
+        await writer.wait_closed()
+    except Exception:
+        pass
+    return True
+
+
+async def probe_endpoints(targets: List[Tuple[str, int]], deadline: float) -> Dict[Tuple[str, int], Optional[bool]]:
+    """Probe all targets concurrently; targets unanswered by the deadline map to None"""
+    tasks = {target: asyncio.ensure_future(probe_port(target[0], target[1], deadline)) for target in set(targets)}
+    if not tasks:
+        return {}
+    done, pending = await asyncio.wait(tasks.values(), timeout=deadline)
+    for task in pending:
+        task.cancel()
+    return {target: (task.result() if task in done else None) for target, task in tasks.items()}
+
+
+def get_port_conflicts(services: ServiceRegistry) -> Dict[int, List[str]]:
+    """Find port conflicts between services (tracked incrementally by the registry)"""
+    return services.port_conflicts()
+
+
+def ports_for_procs(procs: List[Dict[str, Any]], listeners: Optional[ListenerIndex] = None) -> List[int]:
+    """Listening ports of a set of process records"""
+    if listeners is None:
+        listeners = get_listener_index()
     detected_ports = []
-    procs = find_matching_procs(svc)
-    
     for proc_info in procs:
-        try:
-            proc = psutil.Process(proc_info['pid'])
-            connections = proc.connections()
-            for conn in connections:
-                if conn.status == 'LISTEN' and conn.laddr:
-                    port = conn.laddr.port
-                    if port not in detected_ports:
-                        detected_ports.append(port)
-        except (psutil.NoSuchProcess, psutil.AccessDenied):
-            continue
-    
+        for port in listeners.ports_for(proc_info['pid']):
+            if port not in detected_ports:
+                detected_ports.append(port)
     return detected_ports
 
 
-def validate_new_service(new_service: ServiceConfig, existing_services: List[ServiceConfig]) -> Dict[str, Any]:
+def scan_service_for_ports(svc: ServiceConfig, snapshot: Optional["ProcessSnapshot"] = None,
+                           listeners: Optional[ListenerIndex] = None) -> List[int]:
+    """Scan running service processes to detect ports they're using"""
+    return ports_for_procs(find_service_procs(svc, snapshot), listeners)
+
+
+def validate_new_service(new_service: ServiceConfig, existing_services: ServiceRegistry) -> Dict[str, Any]:
     """Validate a new service before adding it"""
     issues = []
     warnings = []
     
-    if any(s.name == new_service.name for s in existing_services):
+    if new_service.name in existing_services:
         issues.append(f"Service name '{new_service.name}' already exists")
     
     if SETTINGS.check_port_conflicts and new_service.ports:
+        listeners = get_listener_index()
         for port in new_service.ports:
-            conflicting = [s.name for s in existing_services if port in s.ports]
+            conflicting = existing_services.by_port(port)
             if conflicting:
                 issues.append(f"Port {port} conflicts with: {', '.join(conflicting)}")
             
-            if is_port_in_use(port):
-                warnings.append(f"Port {port} is currently in use")
+            if is_port_in_use(port, listeners):
+                owners = listeners.owners(port)
+                if owners:
+                    warnings.append(f"Port {port} is currently in use (PID {', '.join(map(str, owners))})")
+                else:
+                    warnings.append(f"Port {port} is currently in use")
     
     return {
         "valid": len(issues) == 0,
@@ -367,49 +809,683 @@ def validate_new_service(new_service: ServiceConfig, existing_services: List[Ser
 # Process Management
 # ------------------------------------------------------------
 
-def _matches_keywords(proc: psutil.Process, keywords: List[str]) -> bool:
-    if not keywords:
-        return False
+PROCESS_SNAPSHOT_MAX_AGE = 1.0  # seconds a snapshot is reused outside a refresh cycle
+
+
+_index_versions = itertools.count(1)
+
+
+class KeywordIndex:
+    """Aho-Corasick automaton over the match_keywords of every service.
+
+    A lowercased cmdline is scanned once, whatever the number of services,
+    and yields the names of all services whose keywords all occur in it.
+    Services are added and removed incrementally: new keywords are inserted
+    into the trie and the failure links are recomputed lazily on the next
+    scan. Keywords nobody uses any more stay in the trie (their matches are
+    ignored) until they outnumber the live ones and the trie is compacted.
+    """
+    def __init__(self, services: Optional[List[ServiceConfig]] = None):
+        self._required: Dict[str, FrozenSet[str]] = {}
+        self._owners: Dict[str, Set[str]] = {}
+        self._reset_trie()
+        self.version = next(_index_versions)  # unique across instances, bumped on change
+        for svc in services or []:
+            self.add_service(svc)
+
+    def _reset_trie(self):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._term: List[Optional[str]] = [None]  # keyword ending at this node
+        self._dict_link: List[int] = [0]  # nearest terminal node on the fail chain
+        self._terminals: Dict[str, int] = {}
+        self._dirty = False
+
+    def _insert(self, keyword: str):
+        node = 0
+        for ch in keyword:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                self._goto.append({})
+                self._fail.append(0)
+                self._term.append(None)
+                self._dict_link.append(0)
+                nxt = len(self._goto) - 1
+                self._goto[node][ch] = nxt
+            node = nxt
+        self._term[node] = keyword
+        self._terminals[keyword] = node
+        self._dirty = True
+
+    def _build_links(self):
+        goto, fail, term, dict_link = self._goto, self._fail, self._term, self._dict_link
+        queue = deque()
+        for child in goto[0].values():
+            fail[child] = 0
+            dict_link[child] = 0
+            queue.append(child)
+        while queue:
+            node = queue.popleft()
+            for ch, child in goto[node].items():
+                f = fail[node]
+                while f and ch not in goto[f]:
+                    f = fail[f]
+                f = goto[f].get(ch, 0)
+                fail[child] = f
+                dict_link[child] = f if term[f] is not None else dict_link[f]
+                queue.append(child)
+        self._dirty = False
+
+    def add_service(self, svc: ServiceConfig):
+        """Index (or re-index) a service's keywords"""
+        self.remove_service(svc.name)
+        keywords = frozenset(k.lower() for k in svc.match_keywords if k)
+        if not keywords:
+            return
+        self._required[svc.name] = keywords
+        for keyword in keywords:
+            if keyword not in self._terminals:
+                self._insert(keyword)
+            self._owners.setdefault(keyword, set()).add(svc.name)
+        self.version = next(_index_versions)
+
+    def remove_service(self, name: str):
+        """Forget a service; compacts the trie once most keywords are unused"""
+        keywords = self._required.pop(name, None)
+        if keywords is None:
+            return
+        for keyword in keywords:
+            owners = self._owners.get(keyword)
+            if owners is not None:
+                owners.discard(name)
+                if not owners:
+                    del self._owners[keyword]
+        self.version = next(_index_versions)
+        if len(self._terminals) > 2 * len(self._owners) + 8:
+            self._reset_trie()
+            for keyword in self._owners:
+                self._insert(keyword)
+
+    def find_keywords(self, cmdline: str) -> Set[str]:
+        """Return every indexed keyword occurring in a lowercased cmdline"""
+        if self._dirty:
+            self._build_links()
+        goto, fail, term, dict_link = self._goto, self._fail, self._term, self._dict_link
+        found: Set[str] = set()
+        node = 0
+        for ch in cmdline:
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            out = node if term[node] is not None else dict_link[node]
+            # Everything further down the chain was collected with this keyword
+            while out and term[out] not in found:
+                found.add(term[out])
+                out = dict_link[out]
+        return found
+
+    def match(self, cmdline: str) -> List[str]:
+        """Return the names of services whose keywords all occur in cmdline"""
+        if not self._required:
+            return []
+        found = self.find_keywords(cmdline)
+        if not found:
+            return []
+        candidates: Set[str] = set()
+        for keyword in found:
+            candidates.update(self._owners.get(keyword, ()))
+        return [name for name in candidates if self._required[name] <= found]
+
+
+def _proc_record(proc: psutil.Process) -> Dict[str, Any]:
+    """Status record for a process; call inside proc.oneshot()"""
     try:
-        cmdline = " ".join(proc.cmdline()).lower()
-        return all(k.lower() in cmdline for k in keywords)
-    except:
-        return False
+        memory = proc.memory_info().rss
+    except psutil.AccessDenied:
+        memory = 0
+    try:
+        cpu = round(proc.cpu_percent(interval=None), 1)
+    except psutil.AccessDenied:
+        cpu = 0.0
+    return {
+        'pid': proc.pid,
+        'name': proc.name() or '',
+        'cpu': cpu,
+        'memory': memory,
+        'create_time': proc.create_time()
+    }
+
+
+class ProcessCache:
+    """psutil.Process objects kept across scans, keyed by (pid, create_time).
+
+    Reusing the same object between scans gives cpu_percent() a previous
+    sample to measure against (a fresh object always reports 0.0) and saves
+    rebuilding every object. Processes that left the table are evicted on
+    each refresh by psutil.pids() membership alone, with no per-process
+    read. PID reuse is checked by create_time only for processes that
+    matter (service matches and managed trees, via verify()), plus a full
+    is_running() sweep every VERIFY_EVERY refreshes.
+    """
+    VERIFY_EVERY = 30
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self._procs: Dict[Tuple[int, float], psutil.Process] = {}
+        self._keys: Dict[int, Tuple[int, float]] = {}
+        self._refreshes = 0
+
+    def _add(self, proc: psutil.Process) -> psutil.Process:
+        key = (proc.pid, proc.create_time())
+        self._procs[key] = proc
+        self._keys[proc.pid] = key
+        return proc
+
+    def _evict(self, pid: int):
+        key = self._keys.pop(pid, None)
+        if key is not None:
+            self._procs.pop(key, None)
+
+    def get(self, pid: int) -> psutil.Process:
+        """Verified cached Process for a live pid (raises psutil.NoSuchProcess)"""
+        with self.lock:
+            current = psutil.Process(pid)
+            key = self._keys.get(pid)
+            if key is not None:
+                if key[1] == current.create_time():
+                    return self._procs[key]
+                self._evict(pid)  # recycled PID
+            return self._add(current)
+
+    def verify(self, proc: psutil.Process) -> psutil.Process:
+        """``proc`` if its PID still belongs to it, else the new process's Process"""
+        return self.get(proc.pid)
+
+    def refresh(self) -> List[psutil.Process]:
+        """Sync with the process table and return every live Process"""
+        with self.lock:
+            self._refreshes += 1
+            sweep = self._refreshes % self.VERIFY_EVERY == 0
+            live = psutil.pids()
+            live_set = set(live)
+            for pid in [pid for pid in self._keys if pid not in live_set]:
+                self._evict(pid)
+            for pid in live:
+                key = self._keys.get(pid)
+                if key is not None:
+                    if not sweep or self._procs[key].is_running():
+                        continue
+                    self._evict(pid)
+                try:
+                    self._add(psutil.Process(pid))
+                except (psutil.NoSuchProcess, psutil.AccessDenied):
+                    continue
+            return list(self._procs.values())
+
+    def __len__(self) -> int:
+        return len(self._procs)
+
+
+PROCESS_CACHE = ProcessCache()
+
+
+class CmdlineCache:
+    """Bounded memo of lowercased cmdlines and keyword matches per (pid, create_time).
+
+    A process's cmdline is read from /proc once; later scans reuse it and
+    only re-run the keyword match when the KeywordIndex version changed.
+    Entries for processes that left the table are evicted every scan, and
+    very young processes are not memoized because a child caught between
+    fork() and exec() still shows its parent's cmdline.
+    """
+    MIN_AGE_SECONDS = 1.0
+
+    def __init__(self, max_entries: int = 16384):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[int, float], List[Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.match_hits = 0
+        self.match_misses = 0
+        self.evictions = 0
+
+    def match(self, key: Tuple[int, float], read_cmdline: Callable[[], str], index: KeywordIndex) -> List[str]:
+        """Service names whose keywords match the process (reads /proc on a miss)"""
+        entry = self._entries.get(key)
+        if entry is not None:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            cmdline, version, names = entry
+            if version == index.version:
+                self.match_hits += 1
+                return names
+        else:
+            self.misses += 1
+            cmdline = read_cmdline()
+        self.match_misses += 1
+        names = index.match(cmdline) if cmdline else []
+        if entry is not None:
+            entry[1], entry[2] = index.version, names
+        elif time.time() - key[1] >= self.MIN_AGE_SECONDS:
+            self._entries[key] = [cmdline, index.version, names]
+            if len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return names
+
+    def retain(self, live_keys: Set[Tuple[int, float]]):
+        """Evict entries of exited or recycled processes"""
+        for key in [key for key in self._entries if key not in live_keys]:
+            del self._entries[key]
+            self.evictions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+            "match_hits": self.match_hits,
+            "match_misses": self.match_misses,
+            "evictions": self.evictions
+        }
+
+
+CMDLINE_CACHE = CmdlineCache()
+
+
+ScanResult = List[Tuple[List[str], Dict[str, Any]]]
+
+
+class PsutilScanner:
+    """Portable process scanner built on the persistent ProcessCache"""
+    available = True
+
+    @staticmethod
+    def _match(proc: psutil.Process, index: KeywordIndex) -> Tuple[Tuple[int, float], List[str]]:
+        key = (proc.pid, proc.create_time())
+        return key, CMDLINE_CACHE.match(key, lambda: " ".join(proc.cmdline()).lower(), index)
+
+    def scan(self, index: KeywordIndex) -> ScanResult:
+        """(matched service names, record) for every process matching a service"""
+        results: ScanResult = []
+        with PROCESS_CACHE.lock:
+            live_keys: Set[Tuple[int, float]] = set()
+            for proc in PROCESS_CACHE.refresh():
+                try:
+                    key, names = self._match(proc, index)
+                    live_keys.add(key)
+                    if not names:
+                        continue
+                    # Only matching processes pay for the PID-reuse check and remaining reads
+                    verified = PROCESS_CACHE.verify(proc)
+                    if verified is not proc:
+                        live_keys.discard(key)
+                        key, names = self._match(verified, index)
+                        live_keys.add(key)
+                        if not names:
+                            continue
+                    with verified.oneshot():
+                        results.append((names, _proc_record(verified)))
+                except Exception:
+                    continue
+            CMDLINE_CACHE.retain(live_keys)
+        return results
+
+
+class ProcfsScanner:
+    """Linux fast path reading /proc/<pid>/stat and cmdline directly.
+
+    One stat read per process yields name, CPU ticks, RSS and start time,
+    so no psutil.Process objects or per-attribute exceptions are involved.
+    CPU percent is derived from the tick delta since the previous scan.
+    Records have the same shape (and create_time arithmetic) as psutil's.
+
+    Start times are remembered by pid, so on warm scans stat is read only
+    for new pids and for pids that match a service (whose read also
+    re-checks the start time). Like ProcessCache, a full re-read every
+    VERIFY_EVERY scans catches a reused pid that now matches a service.
+    """
+    VERIFY_EVERY = ProcessCache.VERIFY_EVERY
+
+    def __init__(self, root: str = "/proc"):
+        self.root = root
+        self._cpu: Dict[Tuple[int, float], Tuple[int, float]] = {}
+        self._create_times: Dict[int, float] = {}
+        self._scans = 0
+        self.available = False
+        if not sys.platform.startswith("linux"):
+            return
+        try:
+            self.clock_ticks = os.sysconf("SC_CLK_TCK")
+            self.page_size = os.sysconf("SC_PAGE_SIZE")
+            with open(os.path.join(root, "stat"), "rb") as f:
+                for line in f:
+                    if line.startswith(b"btime"):
+                        self.boot_time = float(line.split()[1])
+                        break
+                else:
+                    return
+        except (OSError, ValueError, AttributeError):
+            return
+        self.available = True
+
+    def _read_stat(self, pid: str) -> Optional[Tuple[bytes, int, List[bytes], float]]:
+        """(raw stat, index of the ')' closing comm, fields after comm, create_time)"""
+        try:
+            with open(f"{self.root}/{pid}/stat", "rb") as f:
+                data = f.read()
+            # comm may hold spaces or parentheses, so split at the last ')'
+            rpar = data.rindex(b")")
+            fields = data[rpar + 2:].split()
+            return data, rpar, fields, (float(fields[19]) / self.clock_ticks) + self.boot_time
+        except (OSError, ValueError, IndexError):
+            return None
+
+    def _read_cmdline(self, pid: str) -> str:
+        try:
+            with open(f"{self.root}/{pid}/cmdline", "rb") as f:
+                data = f.read()
+        except OSError:
+            return ""
+        return data.rstrip(b"\0").replace(b"\0", b" ").decode(DEFAULT_ENCODING, "replace").lower()
+
+    def scan(self, index: KeywordIndex) -> ScanResult:
+        """(matched service names, record) for every process matching a service"""
+        results: ScanResult = []
+        live_keys: Set[Tuple[int, float]] = set()
+        previous_cpu, cpu = self._cpu, {}
+        known = {} if self._scans % self.VERIFY_EVERY == 0 else self._create_times
+        create_times: Dict[int, float] = {}
+        self._scans += 1
+        now = time.monotonic()
+        with PROCESS_CACHE.lock, os.scandir(self.root) as entries:
+            for entry in entries:
+                pid = entry.name
+                if not pid.isdigit():
+                    continue
+                create_time = known.get(int(pid))
+                stat = None
+                if create_time is None:
+                    stat = self._read_stat(pid)
+                    if stat is None:
+                        continue
+                    create_time = stat[3]
+                names = CMDLINE_CACHE.match((int(pid), create_time), lambda: self._read_cmdline(pid), index)
+                if names and stat is None:
+                    stat = self._read_stat(pid)
+                    if stat is None:
+                        continue
+                    if stat[3] != create_time:  # pid reused since the last scan
+                        create_time = stat[3]
+                        names = CMDLINE_CACHE.match((int(pid), create_time), lambda: self._read_cmdline(pid), index)
+                key = (int(pid), create_time)
+                create_times[key[0]] = create_time
+                live_keys.add(key)
+                if not names:
+                    continue
+                data, rpar, fields, _ = stat
+                ticks = int(fields[11]) + int(fields[12])  # utime + stime
+                cpu[key] = (ticks, now)
+                cpu_percent = 0.0
+                last = previous_cpu.get(key)
+                if last is not None and now > last[1]:
+                    cpu_percent = (ticks - last[0]) / self.clock_ticks / (now - last[1]) * 100
+                results.append((names, {
+                    'pid': int(pid),
+                    'name': data[data.index(b"(") + 1:rpar].decode(DEFAULT_ENCODING, "replace"),
+                    'cpu': round(cpu_percent, 1),
+                    'memory': int(fields[21]) * self.page_size,
+                    'create_time': create_time
+                }))
+            CMDLINE_CACHE.retain(live_keys)
+        self._cpu = cpu
+        self._create_times = create_times
+        return results
+
+
+PROCESS_SCANNERS = ("psutil", "procfs")
+PSUTIL_SCANNER = PsutilScanner()
+PROCFS_SCANNER = ProcfsScanner()
+
+
+def get_process_scanner():
+    """The configured scanner; procfs falls back to psutil where unavailable"""
+    if SETTINGS.process_scanner == "procfs" and PROCFS_SCANNER.available:
+        return PROCFS_SCANNER
+    return PSUTIL_SCANNER
+
+
+class ProcessSnapshot:
+    """One pass over the process table, matched against every service at once"""
+    def __init__(self, services: List[ServiceConfig], index: Optional[KeywordIndex] = None, scanner=None):
+        self.taken_at = time.monotonic()
+        self.matches: Dict[str, List[Dict[str, Any]]] = {svc.name: [] for svc in services}
+        if index is None:
+            index = KeywordIndex(services)
+        if not any(svc.match_keywords for svc in services):
+            return
+        try:
+            for names, record in (scanner or get_process_scanner()).scan(index):
+                for name in names:
+                    if name in self.matches:
+                        self.matches[name].append(record)
+        except Exception:
+            pass
+
+
+KEYWORD_INDEX = KeywordIndex(SERVICES)
+_process_snapshot: Optional[ProcessSnapshot] = None
+
+
+def rebuild_keyword_index():
+    """Replace KEYWORD_INDEX after SERVICES changes.
 
+    The sampler thread may be scanning with the current index, so it is
+    never mutated in place; a scan in progress finishes on the old one.
+    """
+    global KEYWORD_INDEX
+    KEYWORD_INDEX = KeywordIndex(SERVICES)
 
-def find_matching_procs(svc: ServiceConfig) -> List[Dict[str, Any]]:
+
+def get_process_snapshot(refresh: bool = False) -> ProcessSnapshot:
+    """Return the shared snapshot, rebuilding it when stale or when asked to"""
+    global _process_snapshot
+    snapshot = _process_snapshot
+    if refresh or snapshot is None or time.monotonic() - snapshot.taken_at > PROCESS_SNAPSHOT_MAX_AGE:
+        snapshot = _process_snapshot = ProcessSnapshot(SERVICES, KEYWORD_INDEX)
+    return snapshot
+
+
+def invalidate_process_snapshot():
+    """Drop the shared snapshot after the process table or SERVICES changed"""
+    global _process_snapshot
+    _process_snapshot = None
+
+
+def _cached(procs: List[psutil.Process]) -> List[psutil.Process]:
+    cached = []
+    for proc in procs:
+        try:
+            cached.append(PROCESS_CACHE.get(proc.pid))
+        except psutil.NoSuchProcess:
+            continue
+    return cached
+
+
+def _descendants(proc: psutil.Process) -> List[psutil.Process]:
+    """Children of a process without scanning the whole process table on Linux"""
+    if not sys.platform.startswith("linux"):
+        return _cached(proc.children(recursive=True))
+    found: List[psutil.Process] = []
+    pending = [proc.pid]
+    while pending:
+        pid = pending.pop()
+        try:
+            tasks = os.listdir(f"/proc/{pid}/task")
+        except OSError:
+            continue
+        for tid in tasks:
+            try:
+                with open(f"/proc/{pid}/task/{tid}/children", encoding=DEFAULT_ENCODING) as f:
+                    child_pids = [int(c) for c in f.read().split()]
+            except OSError:
+                # Kernel without CONFIG_PROC_CHILDREN
+                return _cached(proc.children(recursive=True))
+            for child_pid in child_pids:
+                try:
+                    found.append(PROCESS_CACHE.get(child_pid))
+                    pending.append(child_pid)
+                except psutil.NoSuchProcess:
+                    continue
+    return found
+
+
+class ProcessRegistry:
+    """Processes spawned by the manager, persisted to a small pidfile store.
+
+    Entries are keyed by service name and verified by (pid, create_time), so
+    a recycled PID is never mistaken for the service. Status, stop and restart
+    go through the registry; the keyword scan is only a fallback for services
+    started outside the manager. The sampler and lifecycle threads share it,
+    so entries, the Process cache and saves are guarded by one lock.
+    """
+    def __init__(self, path: Path):
+        self.path = path
+        self.lock = threading.RLock()
+        self.entries: Dict[str, ManagedProcess] = {}
+        self._procs: Dict[str, psutil.Process] = {}
+        self.load()
+
+    def load(self):
+        if not self.path.exists():
+            return
+        try:
+            data = json.loads(self.path.read_text(encoding=DEFAULT_ENCODING))
+        except Exception:
+            return
+        for entry in data:
+            try:
+                managed = ManagedProcess(**entry)
+            except Exception:
+                continue
+            self.entries[managed.service_name] = managed
+        # Drop services that exited while the manager was down (lookup saves)
+        for name in list(self.entries):
+            self.lookup(name)
+
+    def save(self):
+        with self.lock:
+            try:
+                write_json_atomic(self.path, [entry.to_dict() for entry in self.entries.values()])
+            except OSError:
+                pass
+
+    def register(self, service_name: str, pid: int):
+        try:
+            proc = psutil.Process(pid)
+            create_time = proc.create_time()
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            return
+        pgid = None
+        if hasattr(os, "getpgid"):
+            try:
+                pgid = os.getpgid(pid)
+            except OSError:
+                pass
+        elif sys.platform.startswith("win"):
+            pgid = pid  # CREATE_NEW_PROCESS_GROUP makes the child the group leader
+        with self.lock:
+            self.entries[service_name] = ManagedProcess(
+                service_name=service_name,
+                pid=pid,
+                create_time=create_time,
+                pgid=pgid,
+                started_at=datetime.now().isoformat(),
+            )
+            self._procs[service_name] = proc
+            self.save()
+
+    def forget(self, service_name: str):
+        with self.lock:
+            self._procs.pop(service_name, None)
+            if self.entries.pop(service_name, None) is not None:
+                self.save()
+
+    def lookup(self, service_name: str) -> Optional[psutil.Process]:
+        """Return the live root process of a managed service, or None"""
+        with self.lock:
+            entry = self.entries.get(service_name)
+            if entry is None:
+                return None
+            proc = self._procs.get(service_name)
+            try:
+                if proc is None:
+                    proc = psutil.Process(entry.pid)
+                    if abs(proc.create_time() - entry.create_time) > 0.01:
+                        raise psutil.NoSuchProcess(entry.pid)
+                    self._procs[service_name] = proc
+                # is_running() compares create_time, so a reused PID reads as gone
+                if proc.is_running() and proc.status() != psutil.STATUS_ZOMBIE:
+                    return proc
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                pass
+            self._procs.pop(service_name, None)
+            if self.entries.pop(service_name, None) is not None:
+                self.save()
+            return None
+
+    def tree(self, service_name: str) -> Optional[List[psutil.Process]]:
+        """Root process plus descendants of a managed service, or None"""
+        root = self.lookup(service_name)
+        if root is None:
+            return None
+        try:
+            return [root] + _descendants(root)
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            return [root]
+
+    def procs_for(self, service_name: str) -> Optional[List[Dict[str, Any]]]:
+        """Process records for a managed service, or None to fall back to a scan"""
+        tree = self.tree(service_name)
+        if tree is None:
+            return None
+        records = []
+        with PROCESS_CACHE.lock:
+            for proc in tree:
+                try:
+                    with proc.oneshot():
+                        records.append(_proc_record(proc))
+                except (psutil.NoSuchProcess, psutil.AccessDenied):
+                    continue
+        return records
+
+
+PROCESS_REGISTRY = ProcessRegistry(Path(SETTINGS.storage_paths.get("data", "./data")) / "pids.json")
+
+
+def find_service_procs(svc: ServiceConfig, snapshot: Optional[ProcessSnapshot] = None) -> List[Dict[str, Any]]:
+    """Find a service's processes: the registry first, then the keyword scan"""
+    procs = PROCESS_REGISTRY.procs_for(svc.name)
+    if procs is not None:
+        return procs
+    return find_matching_procs(svc, snapshot)
+
+
+def find_matching_procs(svc: ServiceConfig, snapshot: Optional[ProcessSnapshot] = None) -> List[Dict[str, Any]]:
     """Find processes matching service keywords"""
     if not svc.match_keywords:
         return []
     
-    matches = []
-    try:
-        for p in psutil.process_iter(['pid', 'name', 'cpu_percent', 'memory_info', 'create_time']):
-            try:
-                name = p.info.get('name', '').lower()
-                if any(k.lower() in name for k in svc.match_keywords):
-                    if _matches_keywords(p, svc.match_keywords):
-                        matches.append({
-                            'pid': p.info['pid'],
-                            'name': p.info['name'],
-                            'cpu': round(p.info.get('cpu_percent', 0), 1),
-                            'memory': p.info.get('memory_info', {}).get('rss', 0) if p.info.get('memory_info') else 0,
-                            'create_time': p.info.get('create_time', 0)
-                        })
-                else:
-                    if _matches_keywords(p, svc.match_keywords):
-                        matches.append({
-                            'pid': p.info['pid'],
-                            'name': p.info['name'],
-                            'cpu': round(p.info.get('cpu_percent', 0), 1),
-                            'memory': p.info.get('memory_info', {}).get('rss', 0) if p.info.get('memory_info') else 0,
-                            'create_time': p.info.get('create_time', 0)
-                        })
-            except:
-                continue
-    except:
-        pass
-    return matches
+    if snapshot is None:
+        snapshot = get_process_snapshot()
+    procs = snapshot.matches.get(svc.name)
+    if procs is None:
+        # Service was added after the snapshot was taken
+        procs = ProcessSnapshot([svc]).matches[svc.name]
+    return list(procs)
 
 
 def start_service(svc: ServiceConfig) -> Dict[str, Any]:
@@ -421,17 +1497,20 @@ def start_service(svc: ServiceConfig) -> Dict[str, Any]:
             CREATE_NEW_PROCESS_GROUP = 0x00000200
             creationflags = DETACHED_PROCESS | CREATE_NEW_PROCESS_GROUP
         
-        subprocess.Popen(
+        proc = subprocess.Popen(
             svc.start_cmd,
             cwd=svc.working_dir or None,
             shell=True,
             creationflags=creationflags,
+            # Own session/process group so stop can signal the whole tree
+            start_new_session=not sys.platform.startswith("win"),
             stdin=subprocess.DEVNULL,
             stdout=subprocess.DEVNULL,
             stderr=subprocess.DEVNULL,
         )
+        PROCESS_REGISTRY.register(svc.name, proc.pid)
         
-        time.sleep(0.5)
+        invalidate_process_snapshot()
         runtime_tracker[svc.name].mark_started()
         return {"success": True, "message": f"Started {svc.name}"}
     except Exception as e:
@@ -440,42 +1519,137 @@ def start_service(svc: ServiceConfig) -> Dict[str, Any]:
         return {"success": False, "message": error_msg}
 
 
-def stop_service(svc: ServiceConfig, timeout: float = 5.0) -> Dict[str, Any]:
-    """Stop a service"""
+def _signal_group(pgid: Optional[int], sig: Optional[int]):
+    """Signal a managed process group on POSIX (no-op elsewhere)"""
+    if pgid is None or sig is None or not hasattr(os, "killpg"):
+        return
     try:
-        procs = find_matching_procs(svc)
-        if not procs:
-            runtime_tracker[svc.name].mark_stopped()
-            return {"success": True, "message": "No processes found", "count": 0}
-        
-        proc_objects = []
-        for p_info in procs:
+        os.killpg(pgid, sig)
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+def _stop_targets(svc: ServiceConfig, snapshot: Optional[ProcessSnapshot]) -> Tuple[List[psutil.Process], Optional[int]]:
+    """Processes to stop for a service and, if managed, its process group"""
+    managed = PROCESS_REGISTRY.tree(svc.name)
+    if managed is not None:
+        entry = PROCESS_REGISTRY.entries.get(svc.name)
+        return managed, entry.pgid if entry else None
+    procs = []
+    for p_info in find_matching_procs(svc, snapshot):
+        try:
+            procs.append(psutil.Process(p_info['pid']))
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            pass
+    return procs, None
+
+
+def _stopped(svc: ServiceConfig, count: int) -> Dict[str, Any]:
+    PROCESS_REGISTRY.forget(svc.name)
+    if svc.name in runtime_tracker:
+        runtime_tracker[svc.name].mark_stopped()
+    if not count:
+        return {"success": True, "message": "No processes found", "count": 0}
+    return {"success": True, "message": f"Stopped {count} process(es)", "count": count}
+
+
+def stop_services(services: List[ServiceConfig], timeout: float = 5.0,
+                  snapshot: Optional[ProcessSnapshot] = None,
+                  on_result: Optional[Callable[[str, Dict[str, Any]], None]] = None) -> Dict[str, Dict[str, Any]]:
+    """Stop several services with one shared termination wait.
+
+    Every target gets SIGTERM first, then a single wait_procs covers all of
+    them and survivors get SIGKILL once, so total latency is about one
+    timeout however many services are involved. ``on_result`` is called
+    (from this thread) for each service as soon as its last process is gone.
+    """
+    results: Dict[str, Dict[str, Any]] = {}
+    by_name = {svc.name: svc for svc in services}
+    pending: Dict[str, Set[int]] = {}
+    counts: Dict[str, int] = {}
+    owners: Dict[int, List[str]] = {}
+
+    def report(name: str, result: Dict[str, Any]):
+        if name in results:
+            return
+        results[name] = result
+        if on_result is not None:
+            on_result(name, result)
+
+    def on_gone(proc: psutil.Process):
+        for name in owners.get(proc.pid, []):
+            waiting = pending.get(name)
+            if waiting is None:
+                continue
+            waiting.discard(proc.pid)
+            if not waiting:
+                del pending[name]
+                report(name, _stopped(by_name[name], counts[name]))
+
+    try:
+        if snapshot is None and any(PROCESS_REGISTRY.lookup(svc.name) is None for svc in services):
+            snapshot = get_process_snapshot(refresh=True)
+        targets: Dict[int, psutil.Process] = {}
+        groups: List[int] = []
+        for svc in services:
             try:
-                p = psutil.Process(p_info['pid'])
-                proc_objects.append(p)
-                p.terminate()
-            except (psutil.NoSuchProcess, psutil.AccessDenied):
-                pass
-        
-        if proc_objects:
-            gone, alive = psutil.wait_procs(proc_objects, timeout=timeout)
+                procs, pgid = _stop_targets(svc, snapshot)
+            except Exception as e:
+                if svc.name in runtime_tracker:
+                    runtime_tracker[svc.name].add_error(str(e))
+                report(svc.name, {"success": False, "message": str(e), "count": 0})
+                continue
+            if not procs:
+                report(svc.name, _stopped(svc, 0))
+                continue
+            counts[svc.name] = len(procs)
+            pending[svc.name] = {p.pid for p in procs}
+            for p in procs:
+                targets.setdefault(p.pid, p)
+                owners.setdefault(p.pid, []).append(svc.name)
+            if pgid is not None:
+                groups.append(pgid)
+
+        if targets:
+            for pgid in groups:
+                _signal_group(pgid, getattr(signal, "SIGTERM", None))
+            for p in targets.values():
+                try:
+                    p.terminate()
+                except (psutil.NoSuchProcess, psutil.AccessDenied):
+                    pass
+
+            gone, alive = psutil.wait_procs(list(targets.values()), timeout=timeout, callback=on_gone)
+            if alive:
+                for pgid in groups:
+                    _signal_group(pgid, getattr(signal, "SIGKILL", None))
             for p in alive:
                 try:
                     p.kill()
                 except (psutil.NoSuchProcess, psutil.AccessDenied):
                     pass
-        
-        runtime_tracker[svc.name].mark_stopped()
-        return {"success": True, "message": f"Stopped {len(procs)} process(es)", "count": len(procs)}
+            invalidate_process_snapshot()
+
+        for name in list(pending):
+            report(name, _stopped(by_name[name], counts[name]))
     except Exception as e:
-        error_msg = str(e)
-        runtime_tracker[svc.name].add_error(error_msg)
-        return {"success": False, "message": error_msg, "count": 0}
+        for svc in services:
+            if svc.name not in results:
+                if svc.name in runtime_tracker:
+                    runtime_tracker[svc.name].add_error(str(e))
+                report(svc.name, {"success": False, "message": str(e), "count": 0})
+    return results
 
 
-def get_service_status(svc: ServiceConfig) -> Dict[str, Any]:
+def stop_service(svc: ServiceConfig, timeout: float = 5.0, snapshot: Optional[ProcessSnapshot] = None) -> Dict[str, Any]:
+    """Stop a service"""
+    return stop_services([svc], timeout, snapshot)[svc.name]
+
+
+def get_service_status(svc: ServiceConfig, snapshot: Optional[ProcessSnapshot] = None,
+                       listeners: Optional[ListenerIndex] = None) -> Dict[str, Any]:
     """Get comprehensive status of a service"""
-    procs = find_matching_procs(svc)
+    procs = find_service_procs(svc, snapshot)
     is_running = len(procs) > 0
     
     # Update runtime tracker
@@ -485,12 +1659,12 @@ def get_service_status(svc: ServiceConfig) -> Dict[str, Any]:
         runtime_tracker[svc.name].mark_stopped()
     
     # Scan for actual ports if service is running
-    actual_ports = scan_service_for_ports(svc) if is_running else []
+    actual_ports = ports_for_procs(procs, listeners) if is_running else []
     
     # Port status
     port_status = []
     for port in svc.ports:
-        in_use = is_port_in_use(port)
+        in_use = is_port_in_use(port, listeners)
         port_status.append({
             "port": port,
             "in_use": in_use,
@@ -514,65 +1688,978 @@ def get_service_status(svc: ServiceConfig) -> Dict[str, Any]:
 
 
 def get_all_statuses() -> List[Dict[str, Any]]:
-    """Get status of all services"""
-    return [get_service_status(svc) for svc in SERVICES]
+    """Get status of all services, scanning the process table only if needed"""
+    snapshot = None
+    if any(svc.match_keywords and PROCESS_REGISTRY.lookup(svc.name) is None for svc in SERVICES):
+        snapshot = get_process_snapshot(refresh=True)
+    listeners = get_listener_index(refresh=True)
+    return [get_service_status(svc, snapshot, listeners) for svc in SERVICES]
+
+
+class SystemStatsSampler:
+    """System stats computed from counter deltas, without sleeping.
+
+    Each sample keeps the CPU time and disk I/O counters so the next one can
+    derive CPU utilisation and disk throughput from the difference, instead
+    of blocking in psutil.cpu_percent(interval=...). Readers use ``latest``.
+    """
+    def __init__(self):
+        self._cpu_times = None
+        self._disk_io = None
+        self._sampled_at: Optional[float] = None
+        self.latest: Dict[str, Any] = {}
+        self._prime()
+
+    def _prime(self):
+        try:
+            self._cpu_times = psutil.cpu_times()
+            self._disk_io = psutil.disk_io_counters()
+            self._sampled_at = time.monotonic()
+        except Exception:
+            pass
+
+    @staticmethod
+    def _cpu_total(times) -> float:
+        total = sum(times)
+        # Linux counts guest time inside user/nice as well
+        return total - getattr(times, "guest", 0) - getattr(times, "guest_nice", 0)
+
+    @classmethod
+    def _cpu_busy_percent(cls, before, after) -> float:
+        total = cls._cpu_total(after) - cls._cpu_total(before)
+        if total <= 0:
+            return 0.0
+        idle = (after.idle + getattr(after, "iowait", 0)) - (before.idle + getattr(before, "iowait", 0))
+        return max(0.0, min(100.0, (total - idle) / total * 100))
+
+    def sample(self) -> Dict[str, Any]:
+        try:
+            now = time.monotonic()
+            cpu_times = psutil.cpu_times()
+            disk_io = psutil.disk_io_counters()
+            memory = psutil.virtual_memory()
+            disk = psutil.disk_usage('/')
+            
+            cpu_percent = self._cpu_busy_percent(self._cpu_times, cpu_times) if self._cpu_times else 0.0
+            elapsed = now - self._sampled_at if self._sampled_at else 0
+            read_bps = write_bps = 0.0
+            if disk_io and self._disk_io and elapsed > 0:
+                read_bps = max(0, disk_io.read_bytes - self._disk_io.read_bytes) / elapsed
+                write_bps = max(0, disk_io.write_bytes - self._disk_io.write_bytes) / elapsed
+            self._cpu_times, self._disk_io, self._sampled_at = cpu_times, disk_io, now
+            
+            self.latest = {
+                "cpu_percent": round(cpu_percent, 1),
+                "memory_percent": round(memory.percent, 1),
+                "memory_used_gb": round(memory.used / (1024**3), 2),
+                "memory_total_gb": round(memory.total / (1024**3), 2),
+                "disk_percent": round(disk.percent, 1),
+                "disk_used_gb": round(disk.used / (1024**3), 2),
+                "disk_total_gb": round(disk.total / (1024**3), 2),
+                "disk_read_bps": round(read_bps),
+                "disk_write_bps": round(write_bps)
+            }
+        except Exception:
+            pass
+        return self.latest
+
+
+SYSTEM_STATS = SystemStatsSampler()
 
 
 def get_system_stats() -> Dict[str, Any]:
-    """Get overall system statistics"""
-    try:
-        cpu_percent = psutil.cpu_percent(interval=0.1)
-        memory = psutil.virtual_memory()
-        disk = psutil.disk_usage('/')
-        
+    """Take a new system stats sample (non-blocking; used by the background sampler)"""
+    return SYSTEM_STATS.sample()
+
+
+class PercentHistogram:
+    """Fixed 0.1-wide bins over 0-100 with the servers in each bin.
+
+    Adding or removing a server is O(1); quantiles and top-N walk at most
+    the 1001 bins, so their cost does not grow with the fleet. Histograms
+    with the same bins merge by adding counts.
+    """
+    BINS_PER_UNIT = 10
+    BINS = 100 * BINS_PER_UNIT + 1
+
+    def __init__(self):
+        self.counts = array('l', [0]) * self.BINS
+        self.members: Dict[int, Set[str]] = {}
+        self.total = 0
+
+    @classmethod
+    def _bin(cls, value: float) -> int:
+        # Clamp before scaling: a huge finite value would overflow to inf
+        return int(min(100.0, max(0.0, value)) * cls.BINS_PER_UNIT)
+
+    def add(self, server_id: str, value: float):
+        idx = self._bin(value)
+        self.counts[idx] += 1
+        self.members.setdefault(idx, set()).add(server_id)
+        self.total += 1
+
+    def remove(self, server_id: str, value: float):
+        idx = self._bin(value)
+        bucket = self.members.get(idx)
+        if bucket is None or server_id not in bucket:
+            return
+        bucket.discard(server_id)
+        if not bucket:
+            del self.members[idx]
+        self.counts[idx] -= 1
+        self.total -= 1
+
+    def quantiles(self, qs: Tuple[float, ...]) -> List[Optional[float]]:
+        """Nearest-rank quantiles, accurate to one bin width"""
+        if not self.total:
+            return [None] * len(qs)
+        ranks = [max(1, math.ceil(q * self.total)) for q in qs]
+        result: List[Optional[float]] = [None] * len(qs)
+        seen = 0
+        pending = 0
+        for idx, count in enumerate(self.counts):
+            if not count:
+                continue
+            seen += count
+            while pending < len(ranks) and ranks[pending] <= seen:
+                result[pending] = idx / self.BINS_PER_UNIT
+                pending += 1
+            if pending == len(ranks):
+                break
+        return result
+
+    def highest(self, n: int) -> List[str]:
+        """Members of the highest bins, at least ``n`` of them when available"""
+        found: List[str] = []
+        for idx in range(self.BINS - 1, -1, -1):
+            if self.counts[idx]:
+                found.extend(self.members[idx])
+                if len(found) >= n:
+                    break
+        return found
+
+
+class FleetAggregates:
+    """Running sums and counts of the latest CPU/memory/disk per server.
+
+    Every heartbeat replaces a server's contribution (subtract the old
+    values, add the new ones) in the fleet-wide totals and in the totals of
+    each of its tags, so the summary is O(1) in the number of servers.
+    Fleet-wide percentiles and the hottest servers come from a
+    PercentHistogram per metric, updated the same way.
+    """
+    METRICS = {"cpu": "cpu_percent", "memory": "memory_percent", "disk": "disk_percent"}
+    VALUE_LIMIT = 1e9  # larger magnitudes are bogus and would swamp the float running sums
+    QUANTILES = (0.5, 0.95, 0.99)
+    TOP_N = 5
+
+    def __init__(self):
+        self._contrib: Dict[str, Tuple[Tuple[str, ...], Dict[str, float]]] = {}
+        self._groups: Dict[str, Dict[str, Any]] = {}
+        self._histograms = {key: PercentHistogram() for key in self.METRICS}
+
+    @staticmethod
+    def _values(metrics: Dict[str, Any]) -> Dict[str, float]:
+        values = {}
+        for key, name in FleetAggregates.METRICS.items():
+            value = finite_metric(metrics.get(name))
+            if value is not None and abs(value) <= FleetAggregates.VALUE_LIMIT:
+                values[key] = value
+        return values
+
+    def _apply(self, group: str, values: Dict[str, float], sign: int):
+        totals = self._groups.get(group)
+        if totals is None:
+            totals = self._groups[group] = {"servers": 0, **{key: [0.0, 0] for key in self.METRICS}}
+        totals["servers"] += sign
+        for key, value in values.items():
+            running = totals[key]
+            running[0] += sign * value
+            running[1] += sign
+            if running[1] == 0:
+                running[0] = 0.0  # drop accumulated float error once a metric has no reporters
+        if totals["servers"] == 0 and group:
+            del self._groups[group]
+
+    def update(self, node: ServerNode):
+        """Replace a server's contribution with its current tags and last_metrics"""
+        tags = tuple(dict.fromkeys(node.tags))
+        values = self._values(node.last_metrics or {})
+        self.remove(node.id)
+        self._contrib[node.id] = (tags, values)
+        for group in ("",) + tags:
+            self._apply(group, values, 1)
+        for key, value in values.items():
+            self._histograms[key].add(node.id, value)
+
+    def remove(self, server_id: str):
+        previous = self._contrib.pop(server_id, None)
+        if previous is None:
+            return
+        tags, values = previous
+        for group in ("",) + tags:
+            self._apply(group, values, -1)
+        for key, value in values.items():
+            self._histograms[key].remove(server_id, value)
+
+    def _averages(self, totals: Dict[str, Any]) -> Dict[str, Any]:
+        result: Dict[str, Any] = {"servers_count": totals["servers"]}
+        for key in self.METRICS:
+            total, count = totals[key]
+            result[f"{key}_avg"] = round(total / count, 2) if count else None
+        return result
+
+    def _top(self, key: str, n: int) -> List[Dict[str, Any]]:
+        candidates = self._histograms[key].highest(n)
+        ranked = sorted(candidates, key=lambda server_id: self._contrib[server_id][1][key], reverse=True)[:n]
+        top = []
+        for server_id in ranked:
+            node = ENROLLED_SERVERS.get(server_id)
+            top.append({
+                "server_id": server_id,
+                "name": node.name if node else None,
+                "value": self._contrib[server_id][1][key]
+            })
+        return top
+
+    def summary(self, top_n: Optional[int] = None) -> Dict[str, Any]:
+        overall = self._groups.get("") or {"servers": 0, **{key: [0.0, 0] for key in self.METRICS}}
+        n = self.TOP_N if top_n is None else top_n
+        percentiles: Dict[str, Dict[str, Optional[float]]] = {}
+        top: Dict[str, List[Dict[str, Any]]] = {}
+        for key, histogram in self._histograms.items():
+            p50, p95, p99 = histogram.quantiles(self.QUANTILES)
+            top[key] = self._top(key, max(n, 1))
+            percentiles[key] = {"p50": p50, "p95": p95, "p99": p99, "max": top[key][0]["value"] if top[key] else None}
+            top[key] = top[key][:n]
         return {
-            "cpu_percent": round(cpu_percent, 1),
-            "memory_percent": round(memory.percent, 1),
-            "memory_used_gb": round(memory.used / (1024**3), 2),
-            "memory_total_gb": round(memory.total / (1024**3), 2),
-            "disk_percent": round(disk.percent, 1),
-            "disk_used_gb": round(disk.used / (1024**3), 2),
-            "disk_total_gb": round(disk.total / (1024**3), 2)
+            **self._averages(overall),
+            "percentiles": percentiles,
+            "top": top,
+            "by_tag": {tag: self._averages(totals) for tag, totals in sorted(self._groups.items()) if tag},
+            "last_updated": datetime.utcnow().isoformat(),
         }
-    except:
-        return {}
 
 
-def aggregate_server_metrics() -> Dict[str, Any]:
-    """Aggregate latest metrics from all enrolled servers (top-level; fixed indentation)."""
-    agg = {
-        "servers_count": len(ENROLLED_SERVERS),
-        "cpu_avg": None,
-        "memory_avg": None,
-        "disk_avg": None,
-        "last_updated": datetime.utcnow().isoformat(),
+FLEET = FleetAggregates()
+for _node in ENROLLED_SERVERS.values():
+    FLEET.update(_node)
+
+
+def aggregate_server_metrics(top_n: Optional[int] = None) -> Dict[str, Any]:
+    """Fleet-wide and per-tag averages, percentiles and hottest servers (maintained on heartbeat)"""
+    return FLEET.summary(top_n)
+
+# ------------------------------------------------------------
+# Metric Storage
+# ------------------------------------------------------------
+
+class MetricStore:
+    """Durable heartbeat history in SQLite (WAL), one table per UTC day.
+
+    Heartbeats are queued in memory and written in batches by a background
+    thread, so the request path never touches the disk. Each day is its own
+    ``samples_YYYYMMDD`` segment; retention drops whole segments older than
+    ``stats_retention_days`` instead of deleting rows. On start the newest
+    samples of every enrolled server are loaded back into SERVER_HISTORY.
+
+    Each flush also folds the batch into 1 min, 10 min and 1 h rollup
+    tables (count/sum/min/max/last per server, metric and bucket), so range
+    queries over days read a few hundred rollup rows instead of raw samples.
+    """
+    FLUSH_INTERVAL = 1.0
+    ROLLUP_RESOLUTIONS = (60, 600, 3600)
+    MAX_POINTS = 1000  # range queries widen the step rather than return more buckets
+    RETENTION_INTERVAL = 3600.0
+    MAX_PENDING = 100_000  # oldest heartbeats are dropped if the disk falls this far behind
+
+    def __init__(self):
+        self.path: Optional[Path] = None
+        self._pending: deque = deque(maxlen=self.MAX_PENDING)
+        self._wake = threading.Event()
+        self._stopping = False
+        self._thread: Optional[threading.Thread] = None
+        self._read_lock = threading.Lock()
+        self._reader: Optional[sqlite3.Connection] = None
+        self._tables: Set[str] = set()
+        self.written = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    @staticmethod
+    def _table(ts: float) -> str:
+        return "samples_" + datetime.utcfromtimestamp(ts).strftime("%Y%m%d")
+
+    def _segments(self, conn: sqlite3.Connection) -> List[str]:
+        rows = conn.execute(
+            "SELECT name FROM sqlite_master WHERE type='table' AND name LIKE 'samples_%' ORDER BY name"
+        ).fetchall()
+        return [row[0] for row in rows]
+
+    def start(self, path: Path):
+        """Open the store, reload recent history and start the writer thread"""
+        if self._thread is not None:
+            return
+        self.path = path
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._reader = self._connect()
+        with self._reader:
+            for resolution in self.ROLLUP_RESOLUTIONS:
+                self._reader.execute(
+                    f"CREATE TABLE IF NOT EXISTS rollup_{resolution} ("
+                    "server_id TEXT NOT NULL, metric TEXT NOT NULL, bucket REAL NOT NULL, "
+                    "count INTEGER NOT NULL, sum REAL NOT NULL, min REAL NOT NULL, max REAL NOT NULL, "
+                    "last_ts REAL NOT NULL, last REAL NOT NULL, "
+                    "PRIMARY KEY (server_id, metric, bucket)) WITHOUT ROWID"
+                )
+                self._reader.execute(
+                    f"CREATE INDEX IF NOT EXISTS rollup_{resolution}_bucket ON rollup_{resolution} (bucket)"
+                )
+        self._tables = set(self._segments(self._reader))
+        self.load_recent(SERVER_HISTORY_MAX)
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="metric-store", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Flush pending heartbeats and close the store"""
+        if self._thread is None:
+            return
+        self._stopping = True
+        self._wake.set()
+        self._thread.join()
+        self._thread = None
+        with self._read_lock:
+            self._reader.close()
+            self._reader = None
+
+    def record(self, server_id: str, ts: float, metrics: Dict[str, Any]):
+        if self._thread is None:
+            return
+        values = {}
+        for name, value in metrics.items():
+            value = finite_metric(value)  # SQLite stores NaN as NULL, which would fail the whole flush
+            if value is not None:
+                values[name] = value
+        self._pending.append((server_id, ts, values))
+
+    def _run(self):
+        conn = self._connect()
+        next_retention = 0.0
+        try:
+            while True:
+                self._wake.wait(self.FLUSH_INTERVAL)
+                self._wake.clear()
+                try:
+                    self._flush(conn)
+                    if time.monotonic() >= next_retention:
+                        self.apply_retention(conn)
+                        next_retention = time.monotonic() + self.RETENTION_INTERVAL
+                except sqlite3.Error as e:
+                    print(f"Metric store error: {e}")
+                if self._stopping:
+                    break
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _merge(acc: Optional[List[float]], count: int, total: float, low: float, high: float,
+               last_ts: float, last: float) -> List[float]:
+        """Combine two [count, sum, min, max, last_ts, last] aggregates"""
+        if acc is None:
+            return [count, total, low, high, last_ts, last]
+        acc[0] += count
+        acc[1] += total
+        acc[2] = min(acc[2], low)
+        acc[3] = max(acc[3], high)
+        if last_ts >= acc[4]:
+            acc[4], acc[5] = last_ts, last
+        return acc
+
+    def _flush(self, conn: sqlite3.Connection):
+        batches: Dict[str, List[Tuple[str, float, str]]] = {}
+        rollups: Dict[int, Dict[Tuple[str, str, float], List[float]]] = {r: {} for r in self.ROLLUP_RESOLUTIONS}
+        while self._pending:
+            server_id, ts, values = self._pending.popleft()
+            batches.setdefault(self._table(ts), []).append(
+                (server_id, ts, json.dumps(values, separators=(",", ":")))
+            )
+            for resolution, buckets in rollups.items():
+                bucket = ts - ts % resolution
+                for name, value in values.items():
+                    key = (server_id, name, bucket)
+                    buckets[key] = self._merge(buckets.get(key), 1, value, value, value, ts, value)
+        if not batches:
+            return
+        with conn:
+            for table, rows in batches.items():
+                if table not in self._tables:
+                    conn.execute(
+                        f"CREATE TABLE IF NOT EXISTS {table} ("
+                        "server_id TEXT NOT NULL, ts REAL NOT NULL, metrics TEXT NOT NULL, "
+                        "PRIMARY KEY (server_id, ts)) WITHOUT ROWID"
+                    )
+                    self._tables.add(table)
+                conn.executemany(f"INSERT OR REPLACE INTO {table} VALUES (?, ?, ?)", rows)
+                self.written += len(rows)
+            for resolution, buckets in rollups.items():
+                conn.executemany(
+                    f"INSERT INTO rollup_{resolution} VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT (server_id, metric, bucket) DO UPDATE SET "
+                    "count = count + excluded.count, sum = sum + excluded.sum, "
+                    "min = min(min, excluded.min), max = max(max, excluded.max), "
+                    "last = CASE WHEN excluded.last_ts >= last_ts THEN excluded.last ELSE last END, "
+                    "last_ts = max(last_ts, excluded.last_ts)",
+                    [key + tuple(acc) for key, acc in buckets.items()]
+                )
+
+    def apply_retention(self, conn: sqlite3.Connection):
+        """Drop day segments that fall entirely outside stats_retention_days"""
+        cutoff = self._table(time.time() - max(1, SETTINGS.stats_retention_days) * 86400)
+        expired = [table for table in self._segments(conn) if table < cutoff]
+        for table in expired:
+            conn.execute(f"DROP TABLE IF EXISTS {table}")
+            self._tables.discard(table)
+        oldest = time.time() - max(1, SETTINGS.stats_retention_days) * 86400
+        for resolution in self.ROLLUP_RESOLUTIONS:
+            conn.execute(f"DELETE FROM rollup_{resolution} WHERE bucket < ?", (oldest - resolution,))
+        conn.commit()
+
+    def read(self, server_id: str, start: float, end: float) -> List[Tuple[float, Dict[str, Any]]]:
+        """Stored samples for one server in [start, end], oldest first"""
+        if self._reader is None:
+            return []
+        first, last = self._table(start), self._table(end)
+        samples: List[Tuple[float, Dict[str, Any]]] = []
+        with self._read_lock:
+            for table in self._segments(self._reader):
+                if not first <= table <= last:
+                    continue
+                rows = self._reader.execute(
+                    f"SELECT ts, metrics FROM {table} WHERE server_id = ? AND ts BETWEEN ? AND ? ORDER BY ts",
+                    (server_id, start, end)
+                ).fetchall()
+                samples.extend((ts, json.loads(metrics)) for ts, metrics in rows)
+        return samples
+
+    def query(self, server_id: str, start: float, end: float, step: Optional[float] = None,
+              metrics: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Bucketed min/max/avg/last per metric over [start, end].
+
+        The step is widened to keep at most MAX_POINTS buckets and, when a
+        rollup is used, rounded up to a multiple of its resolution so every
+        rollup bucket falls inside exactly one result bucket. Steps under a
+        minute are computed from the raw samples.
+        """
+        span = max(end - start, 1.0)
+        step = max(step or 0, span / self.MAX_POINTS, 1.0)
+        resolution = max((r for r in self.ROLLUP_RESOLUTIONS if r <= step), default=0)
+        if resolution:
+            step = math.ceil(step / resolution) * resolution
+        wanted = set(metrics) if metrics else None
+        buckets: Dict[str, Dict[float, List[float]]] = {}
+        if resolution:
+            rows: List[Tuple] = []
+            if self._reader is not None:
+                with self._read_lock:
+                    rows = self._reader.execute(
+                        f"SELECT metric, bucket, count, sum, min, max, last_ts, last FROM rollup_{resolution} "
+                        "WHERE server_id = ? AND bucket BETWEEN ? AND ?",
+                        (server_id, start - start % resolution, end)
+                    ).fetchall()
+            for name, bucket, count, total, low, high, last_ts, last in rows:
+                if wanted is not None and name not in wanted:
+                    continue
+                series = buckets.setdefault(name, {})
+                key = bucket - bucket % step
+                series[key] = self._merge(series.get(key), count, total, low, high, last_ts, last)
+        else:
+            for ts, values in self.read(server_id, start, end):
+                key = ts - ts % step
+                for name, value in values.items():
+                    if wanted is not None and name not in wanted:
+                        continue
+                    series = buckets.setdefault(name, {})
+                    series[key] = self._merge(series.get(key), 1, value, value, value, ts, value)
+        timeline = sorted({key for series in buckets.values() for key in series})
+        result: Dict[str, Any] = {
+            "from": start, "to": end, "step": step, "resolution": resolution or "raw",
+            "ts": timeline, "metrics": {}
+        }
+        for name, series in sorted(buckets.items()):
+            columns: Dict[str, List[Optional[float]]] = {"min": [], "max": [], "avg": [], "last": []}
+            for key in timeline:
+                acc = series.get(key)
+                columns["min"].append(acc[2] if acc else None)
+                columns["max"].append(acc[3] if acc else None)
+                columns["avg"].append(round(acc[1] / acc[0], 3) if acc else None)
+                columns["last"].append(acc[5] if acc else None)
+            result["metrics"][name] = columns
+        return result
+
+    def load_recent(self, limit: int):
+        """Fill SERVER_HISTORY with up to ``limit`` newest samples per enrolled server"""
+        with self._read_lock:
+            segments = self._segments(self._reader)[::-1]
+            for server_id in ENROLLED_SERVERS:
+                rows: List[Tuple[float, str]] = []
+                for table in segments:
+                    rows.extend(self._reader.execute(
+                        f"SELECT ts, metrics FROM {table} WHERE server_id = ? ORDER BY ts DESC LIMIT ?",
+                        (server_id, limit - len(rows))
+                    ).fetchall())
+                    if len(rows) >= limit:
+                        break
+                if not rows:
+                    continue
+                history = SERVER_HISTORY[server_id] = MetricRing(SERVER_HISTORY_MAX)
+                for ts, metrics in reversed(rows):
+                    history.append(ts, json.loads(metrics))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "path": str(self.path) if self.path else None,
+            "segments": len(self._tables),
+            "pending": len(self._pending),
+            "written": self.written
+        }
+
+
+METRIC_STORE = MetricStore()
+
+# ------------------------------------------------------------
+# Service Lifecycle Jobs
+# ------------------------------------------------------------
+
+START_SETTLE_SECONDS = 0.5  # give a fresh process time to show up before the next status sample
+LIFECYCLE_EXECUTOR = ThreadPoolExecutor(max_workers=8, thread_name_prefix="lifecycle")
+
+
+@dataclass
+class LifecycleJob:
+    """A start/stop/restart request running in the background."""
+    id: str
+    action: str
+    service_name: str
+    status: str = "pending"  # pending, running, succeeded, failed
+    created_at: str = field(default_factory=lambda: datetime.now().isoformat())
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+    result: Optional[Dict[str, Any]] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+async def _in_lifecycle_executor(func, *args):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(LIFECYCLE_EXECUTOR, func, *args)
+
+
+async def run_start(svc: ServiceConfig) -> Dict[str, Any]:
+    result = await _in_lifecycle_executor(start_service, svc)
+    if result["success"]:
+        await asyncio.sleep(START_SETTLE_SECONDS)
+        invalidate_process_snapshot()
+    return result
+
+
+async def run_stop(svc: ServiceConfig) -> Dict[str, Any]:
+    return await _in_lifecycle_executor(stop_service, svc)
+
+
+async def run_restart(svc: ServiceConfig) -> Dict[str, Any]:
+    stop_result = await run_stop(svc)
+    await asyncio.sleep(START_SETTLE_SECONDS)
+    start_result = await run_start(svc)
+    runtime_tracker[svc.name].restart_count += 1
+    return {
+        "success": start_result["success"],
+        "message": f"Stopped: {stop_result.get('count', 0)} process(es), Started service"
     }
-    cpu_vals: List[float] = []
-    mem_vals: List[float] = []
-    disk_vals: List[float] = []
-    for srv in ENROLLED_SERVERS.values():
-        metrics = srv.last_metrics
-        if not metrics:
+
+
+LIFECYCLE_ACTIONS = {
+    "start": run_start,
+    "stop": run_stop,
+    "restart": run_restart,
+}
+
+
+class JobManager:
+    """Runs lifecycle operations as background jobs with pollable ids.
+
+    Operations on the same service are serialized by a per-service lock;
+    operations on different services run concurrently. Every state change
+    is broadcast as a ``job_update`` WebSocket frame.
+    """
+    def __init__(self, max_jobs: int = 200):
+        self.max_jobs = max_jobs
+        self.jobs: "OrderedDict[str, LifecycleJob]" = OrderedDict()
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    def submit(self, action: str, svc: ServiceConfig) -> LifecycleJob:
+        job = LifecycleJob(id=str(uuid.uuid4()), action=action, service_name=svc.name)
+        self.jobs[job.id] = job
+        self._prune()
+        self._tasks[job.id] = asyncio.create_task(self._run(job, svc))
+        return job
+
+    def get(self, job_id: str) -> Optional[LifecycleJob]:
+        return self.jobs.get(job_id)
+
+    def lock(self, service_name: str) -> asyncio.Lock:
+        return self._locks.setdefault(service_name, asyncio.Lock())
+
+    async def wait(self, job_id: str) -> LifecycleJob:
+        task = self._tasks.get(job_id)
+        if task is not None:
+            await asyncio.shield(task)
+        return self.jobs[job_id]
+
+    def _prune(self):
+        while len(self.jobs) > self.max_jobs:
+            oldest = next(iter(self.jobs))
+            if oldest in self._tasks:
+                break  # never drop a job that is still running
+            del self.jobs[oldest]
+
+    async def _publish(self, job: LifecycleJob):
+        await manager.broadcast({"type": "job_update", "data": job.to_dict()})
+
+    async def _run(self, job: LifecycleJob, svc: ServiceConfig):
+        try:
+            async with self.lock(svc.name):
+                job.status = "running"
+                job.started_at = datetime.now().isoformat()
+                await self._publish(job)
+                try:
+                    job.result = await LIFECYCLE_ACTIONS[job.action](svc)
+                    job.status = "succeeded" if job.result.get("success") else "failed"
+                except Exception as e:
+                    job.result = {"success": False, "message": str(e)}
+                    job.status = "failed"
+                job.finished_at = datetime.now().isoformat()
+            await self._publish(job)
+            await sampler.refresh()
+        finally:
+            self._tasks.pop(job.id, None)
+
+
+jobs = JobManager()
+
+
+async def bulk_stop(services: List[ServiceConfig], timeout: float = 5.0) -> AsyncIterator[Dict[str, Any]]:
+    """Stop services together, yielding each service's result as it finishes"""
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+
+    def on_result(name: str, result: Dict[str, Any]):
+        loop.call_soon_threadsafe(queue.put_nowait, {"service": name, **result})
+
+    async with AsyncExitStack() as stack:
+        # Sorted acquisition keeps concurrent bulk operations deadlock-free
+        for name in sorted(svc.name for svc in services):
+            await stack.enter_async_context(jobs.lock(name))
+        future = loop.run_in_executor(LIFECYCLE_EXECUTOR, stop_services, services, timeout, None, on_result)
+        for _ in services:
+            item = await queue.get()
+            await manager.broadcast({"type": "bulk_stop_result", "data": item})
+            yield item
+        await future
+
+
+async def run_lifecycle_endpoint(action: str, service_name: str, wait: bool) -> Dict[str, Any]:
+    svc = SERVICES.get(service_name)
+    if not svc:
+        return {"success": False, "message": "Service not found"}
+    job = jobs.submit(action, svc)
+    if not wait:
+        return {"success": True, "message": f"{action.capitalize()} queued", "job_id": job.id, "status": job.status}
+    job = await jobs.wait(job.id)
+    return {**(job.result or {}), "job_id": job.id, "status": job.status}
+
+# ------------------------------------------------------------
+# Response Encoding
+# ------------------------------------------------------------
+
+COMPRESS_MIN_BYTES = 1024  # smaller bodies are not worth a compression pass
+
+
+def _json_default(obj: Any) -> Any:
+    if is_dataclass(obj):
+        return asdict(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps_json(obj: Any) -> bytes:
+    """Compact JSON bytes; uses orjson (native dataclasses) when it is installed"""
+    if orjson is not None:
+        return orjson.dumps(obj, default=_json_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False, default=_json_default).encode(DEFAULT_ENCODING)
+
+
+def negotiate_encoding(accept_encoding: str, available) -> str:
+    """Best of br/gzip that the client accepts and we have, else identity"""
+    accepted = set()
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        if params.replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
             continue
-        if "cpu_percent" in metrics:
-            cpu_vals.append(metrics["cpu_percent"])
-        if "memory_percent" in metrics:
-            mem_vals.append(metrics["memory_percent"])
-        if "disk_percent" in metrics:
-            disk_vals.append(metrics["disk_percent"])
-    if cpu_vals:
-        agg["cpu_avg"] = round(sum(cpu_vals) / len(cpu_vals), 2)
-    if mem_vals:
-        agg["memory_avg"] = round(sum(mem_vals) / len(mem_vals), 2)
-    if disk_vals:
-        agg["disk_avg"] = round(sum(disk_vals) / len(disk_vals), 2)
-    return agg
+        accepted.add(coding.strip().lower())
+    for coding in ("br", "gzip"):
+        if coding in available and (coding in accepted or "*" in accepted):
+            return coding
+    return "identity"
+
+
+class EncodedJSON:
+    """A JSON document encoded once and shared by REST responses and WebSocket frames.
+
+    Compressed variants are produced on first request and kept, so a
+    payload served to many clients is compressed at most once per encoding.
+    """
+    def __init__(self, body: bytes):
+        self.body = body
+        self._text: Optional[str] = None
+        self._variants: Dict[str, bytes] = {}
+
+    @classmethod
+    def of(cls, obj: Any) -> "EncodedJSON":
+        return cls(dumps_json(obj))
+
+    @property
+    def text(self) -> str:
+        if self._text is None:
+            self._text = self.body.decode(DEFAULT_ENCODING)
+        return self._text
+
+    def variant(self, coding: str) -> bytes:
+        if coding == "identity":
+            return self.body
+        data = self._variants.get(coding)
+        if data is None:
+            if coding == "br":
+                data = brotli.compress(self.body, quality=5)
+            else:
+                data = gzip.compress(self.body, compresslevel=6, mtime=0)
+            self._variants[coding] = data
+        return data
+
+    def response(self, request: Request) -> Response:
+        available = ("br", "gzip") if brotli is not None else ("gzip",)
+        coding = "identity"
+        if len(self.body) >= COMPRESS_MIN_BYTES:
+            coding = negotiate_encoding(request.headers.get("accept-encoding", ""), available)
+        headers = {"Vary": "Accept-Encoding"}
+        if coding != "identity":
+            headers["Content-Encoding"] = coding
+        return Response(content=self.variant(coding), media_type="application/json", headers=headers)
+
+
+def json_response(request: Request, payload: Any) -> Response:
+    """Encode with dumps_json and compress when the body is large enough"""
+    return EncodedJSON.of(payload).response(request)
+
+
+BOOT_ID = uuid.uuid4().hex[:8]  # versions restart at 1 on every boot; keeps old ETags from matching
+
+
+class VersionedResource:
+    """A GET resource with a version counter that is bumped on every mutation.
+
+    The version is the ETag, so a poll with a current If-None-Match gets a
+    304 without the document being rendered or encoded. The encoding is
+    cached per version. ``?since=<version>`` turns a request into a long
+    poll that returns as soon as the version moves past ``since``.
+    """
+    MAX_WAIT_SECONDS = 60.0
+
+    def __init__(self, name: str, encode: Callable[[], EncodedJSON]):
+        self.name = name
+        self.version = 1
+        self._encode = encode
+        self._encoded: Optional[Tuple[int, EncodedJSON]] = None
+        self._changed: Optional[asyncio.Event] = None
+
+    @property
+    def etag(self) -> str:
+        return f'"{self.name}-{BOOT_ID}-{self.version}"'
+
+    def bump(self):
+        self.version += 1
+        if self._changed is not None:
+            self._changed.set()
+            self._changed = None
+
+    async def wait(self, since: int, timeout: float):
+        """Wait until the version is past ``since`` or the timeout expires"""
+        if self.version > since:
+            return
+        if self._changed is None:
+            self._changed = asyncio.Event()
+        try:
+            await asyncio.wait_for(self._changed.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    async def response(self, request: Request, since: Optional[int] = None, timeout: float = 30.0) -> Response:
+        if since is not None:
+            await self.wait(since, max(0.0, min(timeout, self.MAX_WAIT_SECONDS)))
+        headers = {"ETag": self.etag, "X-Resource-Version": str(self.version), "Cache-Control": "no-cache"}
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and self.etag in {tag.strip() for tag in if_none_match.split(",")}:
+            return Response(status_code=304, headers=headers)
+        if self._encoded is None or self._encoded[0] != self.version:
+            self._encoded = (self.version, self._encode())
+        response = self._encoded[1].response(request)
+        response.headers.update(headers)
+        return response
+
+
+STATUS_RESOURCE = VersionedResource("status", lambda: sampler.encoded)
+SERVERS_RESOURCE = VersionedResource("servers", lambda: EncodedJSON.of(list(ENROLLED_SERVERS.values())))
+SETTINGS_RESOURCE = VersionedResource("settings", lambda: EncodedJSON.of(SETTINGS.to_dict()))
 
 # ------------------------------------------------------------
 # FastAPI Application
 # ------------------------------------------------------------
 
-app = FastAPI(title="Tailscale Server Manager")
+class StatusSampler:
+    """Single background task that samples status and stats for every client.
+
+    Each interval the process/port scan and system stats are computed once
+    (off the event loop) and the same snapshot is broadcast to every
+    WebSocket connection. REST handlers serve the cached snapshot unless the
+    caller asks for a fresh one.
+
+    Over /ws a client gets a full ``status_update`` on connect and then only
+    ``status_delta`` frames holding the services that changed. Every delta
+    carries the next value of a monotonic sequence number; a client that
+    sees a gap sends ``{"type": "resync"}`` and gets a full snapshot back.
+    Values that move every tick (the uptime string, per-process cpu and
+    memory) do not by themselves make a service "changed"; the dashboard
+    derives uptime from ``runtime.started_at``. REST always serves the
+    latest sample.
+    """
+    VOLATILE_PROCESS_FIELDS = ("cpu", "memory")
+
+    def __init__(self):
+        self.statuses: List[Dict[str, Any]] = []
+        self.encoded = EncodedJSON(b"[]")  # statuses, encoded once per change for REST and /ws
+        self.stats: Dict[str, Any] = {}
+        self.updated_at: Optional[float] = None
+        self.seq = 0
+        self._delta: Optional[Dict[str, Any]] = None
+        self._task: Optional[asyncio.Task] = None
+        self._lock: Optional[asyncio.Lock] = None
+
+    def start(self):
+        self._lock = asyncio.Lock()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    @staticmethod
+    def _sample():
+        return get_all_statuses(), get_system_stats()
+
+    async def refresh(self, publish: bool = True):
+        """Recompute the snapshot now and optionally push it to all clients"""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            loop = asyncio.get_running_loop()
+            statuses, self.stats = await loop.run_in_executor(None, self._sample)
+            self._delta = self._diff(self.statuses, statuses)
+            if self._delta is not None:
+                self.seq += 1
+                self._delta["seq"] = self.seq
+            if statuses != self.statuses or self.updated_at is None:
+                self.encoded = EncodedJSON.of(statuses)
+                STATUS_RESOURCE.bump()
+            self.statuses = statuses
+            self.updated_at = time.time()
+        if publish:
+            await self.publish()
+
+    @classmethod
+    def _stable(cls, status: Dict[str, Any]) -> Dict[str, Any]:
+        """A service status without the fields that change on every sample"""
+        runtime = dict(status["runtime"])
+        runtime.pop("uptime", None)
+        processes = [{k: v for k, v in proc.items() if k not in cls.VOLATILE_PROCESS_FIELDS}
+                     for proc in status["processes"]]
+        return {**status, "runtime": runtime, "processes": processes}
+
+    @classmethod
+    def _diff(cls, old: List[Dict[str, Any]], new: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """Per-service changes between two samples, or None if nothing changed"""
+        previous = {s["name"]: cls._stable(s) for s in old}
+        names = [s["name"] for s in new]
+        changed = [s for s in new if previous.get(s["name"]) != cls._stable(s)]
+        removed = [name for name in previous if name not in set(names)]
+        reordered = names != [s["name"] for s in old]
+        if not changed and not removed and not reordered:
+            return None
+        delta: Dict[str, Any] = {"type": "status_delta", "changed": changed, "removed": removed}
+        if reordered:
+            delta["order"] = names
+        return delta
+
+    def full_frame(self) -> str:
+        """Pre-encoded ``status_update`` frame, spliced around the cached statuses JSON"""
+        return f'{{"type":"status_update","seq":{self.seq},"data":{self.encoded.text}}}'
+
+    async def ensure_fresh(self, fresh: bool = False):
+        if fresh or self.updated_at is None:
+            await self.refresh()
+
+    async def publish(self):
+        if self._delta is not None:
+            await manager.broadcast(self._delta)
+            self._delta = None
+        await manager.broadcast({"type": "system_stats", "data": self.stats})
+
+    async def _run(self):
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                print(f"Status sampler error: {e}")
+            await asyncio.sleep(max(1, SETTINGS.update_interval_seconds))
+
+
+sampler = StatusSampler()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    METRIC_STORE.start(Path(SETTINGS.storage_paths.get("data", "./data")) / "metrics.db")
+    sampler.start()
+    try:
+        yield
+    finally:
+        await sampler.stop()
+        await PERSISTENCE.flush()
+        METRIC_STORE.stop()
+
+
+app = FastAPI(title="Tailscale Server Manager", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -582,36 +2669,165 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+def encode_frame(message: Any) -> str:
+    """Frame text for a message; already-encoded frames pass through"""
+    if isinstance(message, str):
+        return message
+    return dumps_json(message).decode(DEFAULT_ENCODING)
+
+
+RESYNC = object()  # queue marker: replace dropped frames with a full snapshot
+
+
+class ClientConnection:
+    """One WebSocket client with its own bounded outbound queue and writer task"""
+    def __init__(self, websocket: WebSocket, max_queue: int):
+        self.websocket = websocket
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self.writer: Optional[asyncio.Task] = None
+        self.overflows = 0
+
+
 # WebSocket connection manager
 class ConnectionManager:
+    """Fans frames out to clients without letting one slow client hold up the rest.
+
+    broadcast() serializes a message once and only enqueues the text; each
+    client's writer task does the actual send. A client whose queue fills up
+    has its stale frames dropped and replaced by a single full-snapshot
+    resync; one that keeps falling behind, or whose send stalls, is evicted.
+    """
+    MAX_QUEUE = 32
+    MAX_OVERFLOWS = 3
+    SEND_TIMEOUT = 10.0
+
     def __init__(self):
-        self.active_connections: List[WebSocket] = []
+        self._clients: Dict[WebSocket, ClientConnection] = {}
+    
+    @property
+    def active_connections(self) -> List[WebSocket]:
+        return list(self._clients)
     
     async def connect(self, websocket: WebSocket):
         await websocket.accept()
-        self.active_connections.append(websocket)
+        client = ClientConnection(websocket, self.MAX_QUEUE)
+        self._clients[websocket] = client
+        client.writer = asyncio.create_task(self._write(client))
     
     def disconnect(self, websocket: WebSocket):
-        self.active_connections.remove(websocket)
+        client = self._clients.pop(websocket, None)
+        if client and client.writer and client.writer is not asyncio.current_task():
+            client.writer.cancel()
+    
+    async def send(self, websocket: WebSocket, message: Any):
+        """Queue a frame for a single client"""
+        client = self._clients.get(websocket)
+        if client:
+            self._offer(client, encode_frame(message))
     
     async def broadcast(self, message: Dict[str, Any]):
-        for connection in self.active_connections:
-            try:
-                await connection.send_json(message)
-            except:
-                pass
+        if not self._clients:
+            return
+        text = encode_frame(message)
+        for client in list(self._clients.values()):
+            self._offer(client, text)
+    
+    def _offer(self, client: ClientConnection, item: Any):
+        try:
+            client.queue.put_nowait(item)
+            return
+        except asyncio.QueueFull:
+            pass
+        client.overflows += 1
+        if client.overflows > self.MAX_OVERFLOWS:
+            asyncio.create_task(self._evict(client))
+            return
+        # Coalesce: everything queued is stale, one snapshot supersedes it
+        while not client.queue.empty():
+            client.queue.get_nowait()
+        client.queue.put_nowait(RESYNC)
+    
+    async def _write(self, client: ClientConnection):
+        try:
+            while True:
+                item = await client.queue.get()
+                if item is RESYNC:
+                    frames = [sampler.full_frame(),
+                              encode_frame({"type": "system_stats", "data": sampler.stats})]
+                else:
+                    frames = [item]
+                for text in frames:
+                    await asyncio.wait_for(client.websocket.send_text(text), self.SEND_TIMEOUT)
+                if client.queue.empty():
+                    client.overflows = 0  # caught up; only persistent lag leads to eviction
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            # Close rather than just forget the socket, so the browser sees onclose and reconnects
+            await self._evict(client)
+    
+    async def _evict(self, client: ClientConnection):
+        self.disconnect(client.websocket)
+        try:
+            # try again later; bounded because the send path may be the thing that is stuck
+            await asyncio.wait_for(client.websocket.close(code=1013), self.SEND_TIMEOUT)
+        except Exception:
+            pass
 
 
 manager = ConnectionManager()
 
 
+class StaticAsset:
+    """A file kept in memory with precompressed variants, reloaded when its mtime changes.
+
+    Each encoding gets its own strong ETag (content hash plus encoding), so
+    a conditional request is answered with 304 without touching the body.
+    """
+    def __init__(self, path: Path, media_type: str):
+        self.path = path
+        self.media_type = media_type
+        self._stamp: Optional[Tuple[int, int]] = None
+        self.variants: Dict[str, Tuple[bytes, str]] = {}
+
+    def load(self):
+        """Refresh the cached variants if the file changed; raises OSError if it is missing"""
+        st = self.path.stat()
+        stamp = (st.st_mtime_ns, st.st_size)
+        if stamp == self._stamp:
+            return
+        body = self.path.read_bytes()
+        digest = hashlib.sha256(body).hexdigest()[:32]
+        variants = {"identity": (body, f'"{digest}"')}
+        variants["gzip"] = (gzip.compress(body, compresslevel=9, mtime=0), f'"{digest}-gzip"')
+        if brotli is not None:
+            variants["br"] = (brotli.compress(body, quality=11), f'"{digest}-br"')
+        self.variants, self._stamp = variants, stamp
+
+    def response(self, request: Request) -> Response:
+        self.load()
+        coding = negotiate_encoding(request.headers.get("accept-encoding", ""), self.variants)
+        body, etag = self.variants[coding]
+        headers = {"ETag": etag, "Vary": "Accept-Encoding", "Cache-Control": "no-cache"}
+        if coding != "identity":
+            headers["Content-Encoding"] = coding
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match:
+            tags = {tag.strip()[2:] if tag.strip().startswith("W/") else tag.strip() for tag in if_none_match.split(",")}
+            if etag in tags or "*" in tags:
+                return Response(status_code=304, headers=headers)
+        return Response(content=body, media_type=self.media_type, headers=headers)
+
+
+INDEX_PAGE = StaticAsset(Path(__file__).parent / "index.html", "text/html; charset=utf-8")
+
+
 @app.get("/")
-async def get_index():
-    """Serve the main HTML page"""
+async def get_index(request: Request):
+    """Serve the main HTML page (cached, precompressed, ETag/304)"""
     try:
-        html_file = Path(__file__).parent / "index.html"
-        if html_file.exists():
-            return HTMLResponse(content=html_file.read_text(encoding=DEFAULT_ENCODING, errors="replace"))
+        if INDEX_PAGE.path.exists():
+            return INDEX_PAGE.response(request)
         else:
             return HTMLResponse(content="""
                 <html>
@@ -645,6 +2861,18 @@ async def health_check():
     }
 
 
+@app.get("/api/diagnostics")
+async def get_diagnostics():
+    """Cache counters for verifying scan cost on large hosts"""
+    return {
+        "cmdline_cache": CMDLINE_CACHE.stats(),
+        "process_cache": {"entries": len(PROCESS_CACHE)},
+        "managed_processes": len(PROCESS_REGISTRY.entries),
+        "metric_store": METRIC_STORE.stats(),
+        "persistence": PERSISTENCE.stats()
+    }
+
+
 @app.get("/api/services")
 async def get_services():
     """Get list of all services with their configurations"""
@@ -652,15 +2880,16 @@ async def get_services():
 
 
 @app.get("/api/status")
-async def get_status():
-    """Get status of all services"""
-    return get_all_statuses()
+async def get_status(request: Request, fresh: bool = False, since: Optional[int] = None, timeout: float = 30.0):
+    """Get status of all services (cached sample unless fresh=true; ETag/304, ?since= long poll)"""
+    await sampler.ensure_fresh(fresh)
+    return await STATUS_RESOURCE.response(request, since, timeout)
 
 
 @app.get("/api/settings")
-async def get_settings():
-    """Get current server settings"""
-    return SETTINGS.to_dict()
+async def get_settings(request: Request, since: Optional[int] = None, timeout: float = 30.0):
+    """Get current server settings (ETag/304, ?since= long poll)"""
+    return await SETTINGS_RESOURCE.response(request, since, timeout)
 
 
 @app.post("/api/settings")
@@ -668,6 +2897,15 @@ async def update_settings(settings_update: SettingsUpdate):
     """Update server settings"""
     global SETTINGS
     
+    # Validate everything first so a rejected update leaves SETTINGS untouched
+    if settings_update.port_check_mode is not None and settings_update.port_check_mode not in PORT_CHECK_MODES:
+        raise HTTPException(status_code=400, detail=f"port_check_mode must be one of: {', '.join(PORT_CHECK_MODES)}")
+    if settings_update.process_scanner is not None and settings_update.process_scanner not in PROCESS_SCANNERS:
+        raise HTTPException(status_code=400, detail=f"process_scanner must be one of: {', '.join(PROCESS_SCANNERS)}")
+    deadline = settings_update.probe_deadline_seconds
+    if deadline is not None and not (math.isfinite(deadline) and deadline > 0):
+        raise HTTPException(status_code=400, detail="probe_deadline_seconds must be a positive number")
+    
     if settings_update.storage_paths is not None:
         SETTINGS.storage_paths = settings_update.storage_paths
     if settings_update.scheduled_tasks is not None:
@@ -684,6 +2922,13 @@ async def update_settings(settings_update: SettingsUpdate):
         SETTINGS.update_interval_seconds = settings_update.update_interval_seconds
     if settings_update.api_base_url is not None:
         SETTINGS.api_base_url = settings_update.api_base_url
+    if settings_update.port_check_mode is not None:
+        SETTINGS.port_check_mode = settings_update.port_check_mode
+    if settings_update.probe_deadline_seconds is not None:
+        SETTINGS.probe_deadline_seconds = settings_update.probe_deadline_seconds
+    if settings_update.process_scanner is not None:
+        SETTINGS.process_scanner = settings_update.process_scanner
+        invalidate_process_snapshot()
     
     save_settings(SETTINGS)
     
@@ -693,9 +2938,11 @@ async def update_settings(settings_update: SettingsUpdate):
 
 
 @app.get("/api/stats")
-async def get_stats():
-    """Get system statistics"""
-    return get_system_stats()
+async def get_stats(fresh: bool = False):
+    """Get system statistics (latest background sample unless fresh=true)"""
+    if fresh or not SYSTEM_STATS.latest:
+        return get_system_stats()
+    return SYSTEM_STATS.latest
 
 
 # ------------------------------------------------------------
@@ -719,30 +2966,149 @@ async def register_server(server: ServerRegisterModel):
         last_metrics={},
     )
     ENROLLED_SERVERS[srv_id] = node
+    FLEET.update(node)
     save_servers()
     return {"success": True, "server_id": srv_id, "message": "Server enrolled"}
 
 
+def invalid_metric(metrics: Dict[str, Any]) -> Optional[str]:
+    """Name of the first numeric metric that is NaN, infinite or too large for a float"""
+    for name, value in metrics.items():
+        if isinstance(value, (int, float)) and not isinstance(value, bool) and finite_metric(value) is None:
+            return name
+    return None
+
+
+def apply_heartbeat(node: ServerNode, now: float, seen: str, metrics: Dict[str, Any]):
+    """Record one heartbeat: latest metrics, fleet aggregates, ring history and store"""
+    node.last_seen = seen
+    node.last_metrics = metrics
+    FLEET.update(node)
+    history = SERVER_HISTORY.get(node.id)
+    if history is None:
+        history = SERVER_HISTORY[node.id] = MetricRing(SERVER_HISTORY_MAX)
+    history.append(now, metrics)
+    METRIC_STORE.record(node.id, now, metrics)
+    save_servers(SERVERS_PERSIST_DELAY)
+
+
+class HeartbeatBatch:
+    """Validates and applies batched heartbeat records without pydantic.
+
+    A record is ``{"server_id": str, "metrics": {...}}``. Each call to
+    ``apply`` takes one timestamp and runs without awaiting, so a batch
+    lands as a single update. Bad records are counted and the first few
+    reported, rather than failing the whole batch.
+    """
+    MAX_ERRORS = 100
+    INVALID_JSON = object()
+
+    def __init__(self):
+        self.accepted = 0
+        self.rejected = 0
+        self.errors: List[Dict[str, Any]] = []
+        self._index = 0
+
+    def _reject(self, index: int, error: str):
+        self.rejected += 1
+        if len(self.errors) < self.MAX_ERRORS:
+            self.errors.append({"index": index, "error": error})
+
+    def apply(self, records: List[Any]):
+        now = time.time()
+        seen = datetime.utcfromtimestamp(now).isoformat()
+        for record in records:
+            index = self._index
+            self._index += 1
+            if type(record) is not dict:
+                self._reject(index, "invalid JSON" if record is self.INVALID_JSON else "record must be an object")
+                continue
+            server_id = record.get("server_id")
+            metrics = record.get("metrics")
+            if type(server_id) is not str or type(metrics) is not dict:
+                self._reject(index, "record needs a string server_id and an object metrics")
+                continue
+            node = ENROLLED_SERVERS.get(server_id)
+            if node is None:
+                self._reject(index, "server not found")
+                continue
+            bad = invalid_metric(metrics)
+            if bad is not None:
+                self._reject(index, f"metric '{bad}' must be a finite number")
+                continue
+            apply_heartbeat(node, now, seen, metrics)
+            self.accepted += 1
+
+    def parse_lines(self, lines: List[bytes]) -> List[Any]:
+        records = []
+        for line in lines:
+            if not line.strip():
+                continue
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                records.append(self.INVALID_JSON)  # rejected at its position
+        return records
+
+    def result(self) -> Dict[str, Any]:
+        return {
+            "success": self.rejected == 0,
+            "accepted": self.accepted,
+            "rejected": self.rejected,
+            "errors": self.errors
+        }
+
+
+@app.post("/api/servers/heartbeats")
+async def server_heartbeats(request: Request):
+    """Batch heartbeat ingestion for relays and gateways.
+
+    Accepts a JSON array of records (or ``{"heartbeats": [...]}``), or an
+    NDJSON stream with ``Content-Type: application/x-ndjson``, which is
+    applied chunk by chunk as it arrives.
+    """
+    batch = HeartbeatBatch()
+    if "ndjson" in request.headers.get("content-type", ""):
+        buffer = b""
+        async for chunk in request.stream():
+            buffer += chunk
+            lines = buffer.split(b"\n")
+            buffer = lines.pop()
+            if lines:
+                batch.apply(batch.parse_lines(lines))
+        if buffer:
+            batch.apply(batch.parse_lines([buffer]))
+        return batch.result()
+    try:
+        payload = json.loads(await request.body())
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Body must be JSON or NDJSON")
+    if isinstance(payload, dict):
+        payload = payload.get("heartbeats")
+    if not isinstance(payload, list):
+        raise HTTPException(status_code=400, detail="Expected a list of heartbeat records")
+    batch.apply(payload)
+    return batch.result()
+
+
 @app.post("/api/servers/{server_id}/heartbeat")
 async def server_heartbeat(server_id: str, heartbeat: ServerHeartbeatModel):
     """Receive heartbeat & metrics from enrolled server."""
     node = ENROLLED_SERVERS.get(server_id)
     if not node:
         raise HTTPException(status_code=404, detail="Server not found")
-    node.last_seen = datetime.utcnow().isoformat()
-    node.last_metrics = heartbeat.metrics
-    # Append to history
-    history = SERVER_HISTORY.setdefault(server_id, [])
-    history.append({"ts": node.last_seen, **heartbeat.metrics})
-    if len(history) > SERVER_HISTORY_MAX:
-        SERVER_HISTORY[server_id] = history[-SERVER_HISTORY_MAX:]
+    bad = invalid_metric(heartbeat.metrics)
+    if bad is not None:
+        raise HTTPException(status_code=400, detail=f"Metric '{bad}' must be a finite number")
+    now = time.time()
+    apply_heartbeat(node, now, datetime.utcfromtimestamp(now).isoformat(), heartbeat.metrics)
     return {"success": True, "message": "Heartbeat recorded"}
 
 
 @app.get("/api/servers")
-async def list_servers():
-    """List enrolled servers."""
-    return [srv.to_dict() for srv in ENROLLED_SERVERS.values()]
+async def list_servers(request: Request, since: Optional[int] = None, timeout: float = 30.0):
+    """List enrolled servers (ETag/304, ?since= long poll)."""
+    return await SERVERS_RESOURCE.response(request, since, timeout)
 
 
 @app.get("/api/servers/{server_id}")
@@ -754,18 +3120,66 @@ async def get_server(server_id: str):
 
 
 @app.get("/api/metrics/summary")
-async def metrics_summary():
-    return aggregate_server_metrics()
+async def metrics_summary(top: int = FleetAggregates.TOP_N):
+    if not 0 <= top <= 100:
+        raise HTTPException(status_code=400, detail="top must be between 0 and 100")
+    return aggregate_server_metrics(top)
+
+
+MAX_TIMESTAMP = 253402300799.0  # 9999-12-31T23:59:59Z
+
+
+def parse_timestamp(value: str) -> float:
+    """Epoch seconds or an ISO 8601 timestamp (naive means UTC)"""
+    try:
+        ts = float(value)
+    except ValueError:
+        try:
+            parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            raise HTTPException(status_code=400, detail=f"Invalid timestamp: {value}")
+        if parsed.tzinfo is None:
+            parsed = parsed.replace(tzinfo=timezone.utc)
+        ts = parsed.timestamp()
+    # Store segment names come from utcfromtimestamp, which needs a finite year 1970-9999 value
+    if not math.isfinite(ts) or not 0 <= ts <= MAX_TIMESTAMP:
+        raise HTTPException(status_code=400, detail=f"Invalid timestamp: {value}")
+    return ts
 
 
 @app.get("/api/metrics/{server_id}")
-async def metrics_for_server(server_id: str):
+async def metrics_for_server(request: Request, server_id: str, format: str = "records",
+                             start: Optional[str] = Query(None, alias="from"), to: Optional[str] = None,
+                             step: Optional[float] = None, metrics: Optional[str] = None):
+    """Heartbeat history as records (default) or as columns (format=columns).
+
+    With from/to/step (epoch seconds or ISO timestamps) returns bucketed
+    min/max/avg/last per metric from the stored rollups; metrics= is a
+    comma-separated filter.
+    """
     if server_id not in ENROLLED_SERVERS:
         raise HTTPException(status_code=404, detail="Server not found")
-    return {
+    if start is not None or to is not None or step is not None:
+        end = parse_timestamp(to) if to is not None else time.time()
+        begin = parse_timestamp(start) if start is not None else end - 3600
+        if begin >= end:
+            raise HTTPException(status_code=400, detail="'from' must be before 'to'")
+        if step is not None and not (math.isfinite(step) and step > 0):
+            raise HTTPException(status_code=400, detail="'step' must be a positive number")
+        names = [m.strip() for m in metrics.split(",") if m.strip()] if metrics else None
+        loop = asyncio.get_running_loop()
+        series = await loop.run_in_executor(None, METRIC_STORE.query, server_id, begin, end, step, names)
+        return json_response(request, {"server_id": server_id, **series})
+    history = SERVER_HISTORY.get(server_id)
+    if format == "columns":
+        return json_response(request, {
+            "server_id": server_id,
+            "columns": history.to_columns() if history else {"ts": []}
+        })
+    return json_response(request, {
         "server_id": server_id,
-        "history": SERVER_HISTORY.get(server_id, [])
-    }
+        "history": history.to_records() if history else []
+    })
 
 
 @app.post("/api/servers/{server_id}/command")
@@ -785,11 +3199,11 @@ async def server_command(server_id: str, cmd: ServerCommandModel):
 # Scheduled Tasks CRUD Endpoints (Basic persistence only)
 # ------------------------------------------------------------
 
+TASKS = TaskIndex()
+
+
 def _find_task_index(name: str) -> int:
-    for i, t in enumerate(SETTINGS.scheduled_tasks):
-        if t.get("name") == name:
-            return i
-    return -1
+    return TASKS.find(name)
 
 
 @app.get("/api/tasks")
@@ -804,7 +3218,7 @@ async def create_task(task: ScheduledTaskModel):
     # Minimal validation of cron expression (very naive)
     if len(task.cron_expression.split()) < 5:
         raise HTTPException(status_code=400, detail="Invalid cron expression format")
-    SETTINGS.scheduled_tasks.append(task.dict())
+    TASKS.append(task.dict())
     save_settings(SETTINGS)
     return {"success": True, "message": "Task created"}
 
@@ -814,7 +3228,7 @@ async def update_task(task_name: str, task: ScheduledTaskModel):
     idx = _find_task_index(task_name)
     if idx == -1:
         raise HTTPException(status_code=404, detail="Task not found")
-    SETTINGS.scheduled_tasks[idx] = task.dict()
+    TASKS.replace(idx, task.dict())
     save_settings(SETTINGS)
     return {"success": True, "message": "Task updated"}
 
@@ -824,7 +3238,7 @@ async def delete_task(task_name: str):
     idx = _find_task_index(task_name)
     if idx == -1:
         raise HTTPException(status_code=404, detail="Task not found")
-    SETTINGS.scheduled_tasks.pop(idx)
+    TASKS.pop(idx)
     save_settings(SETTINGS)
     return {"success": True, "message": "Task deleted"}
 
@@ -833,17 +3247,46 @@ async def delete_task(task_name: str):
 async def get_conflicts():
     """Get port conflict information"""
     conflicts = get_port_conflicts(SERVICES)
+    listeners = get_listener_index()
+    in_use = {
+        port: listeners.owners(port)
+        for port in SERVICES.ports()
+        if listeners.is_listening(port)
+    }
     return {
         "has_conflicts": len(conflicts) > 0,
-        "conflicts": conflicts
+        "conflicts": conflicts,
+        "in_use": in_use
+    }
+
+
+@app.get("/api/probe")
+async def probe_services(service: Optional[str] = None):
+    """Probe remote and Tailscale endpoints of services concurrently"""
+    if service is None:
+        services = list(SERVICES)
+    else:
+        svc = SERVICES.get(service)
+        services = [svc] if svc else []
+    if service is not None and not services:
+        raise HTTPException(status_code=404, detail="Service not found")
+    targets = {svc.name: service_probe_targets(svc) for svc in services}
+    results = await probe_endpoints(
+        [t for svc_targets in targets.values() for t in svc_targets],
+        SETTINGS.probe_deadline_seconds
+    )
+    return {
+        name: [
+            {"host": host, "port": port, "reachable": results.get((host, port))}
+            for host, port in svc_targets
+        ]
+        for name, svc_targets in targets.items()
     }
 
 
 @app.post("/api/service/add")
 async def add_service(service: ServiceAdd):
     """Add a new service"""
-    global SERVICES
-    
     new_svc = ServiceConfig(**service.dict())
     
     validation = validate_new_service(new_svc, SERVICES)
@@ -854,8 +3297,10 @@ async def add_service(service: ServiceAdd):
             "warnings": validation["warnings"]
         })
     
-    SERVICES.append(new_svc)
+    SERVICES.add(new_svc)
     runtime_tracker[new_svc.name] = ServiceRuntime(new_svc.name)
+    rebuild_keyword_index()
+    invalidate_process_snapshot()
     save_services(SERVICES)
     
     await manager.broadcast({"type": "service_added", "data": new_svc.to_dict()})
@@ -870,11 +3315,12 @@ async def add_service(service: ServiceAdd):
 @app.delete("/api/service/{service_name}")
 async def delete_service(service_name: str):
     """Delete a service"""
-    global SERVICES
-    
-    SERVICES = [s for s in SERVICES if s.name != service_name]
+    SERVICES.remove(service_name)
     if service_name in runtime_tracker:
         del runtime_tracker[service_name]
+    rebuild_keyword_index()
+    PROCESS_REGISTRY.forget(service_name)
+    invalidate_process_snapshot()
     
     save_services(SERVICES)
     
@@ -884,62 +3330,48 @@ async def delete_service(service_name: str):
 
 
 @app.post("/api/service/{service_name}/start")
-async def start_service_endpoint(service_name: str):
-    """Start a service"""
-    svc = next((s for s in SERVICES if s.name == service_name), None)
-    if not svc:
-        return {"success": False, "message": "Service not found"}
-    
-    result = start_service(svc)
-    
-    await manager.broadcast({"type": "status_update", "data": get_all_statuses()})
-    
-    return result
+async def start_service_endpoint(service_name: str, wait: bool = True):
+    """Start a service (wait=false returns a job id immediately)"""
+    return await run_lifecycle_endpoint("start", service_name, wait)
 
 
 @app.post("/api/service/{service_name}/stop")
-async def stop_service_endpoint(service_name: str):
-    """Stop a service"""
-    svc = next((s for s in SERVICES if s.name == service_name), None)
-    if not svc:
-        return {"success": False, "message": "Service not found"}
-    
-    result = stop_service(svc)
-    
-    await manager.broadcast({"type": "status_update", "data": get_all_statuses()})
-    
-    return result
+async def stop_service_endpoint(service_name: str, wait: bool = True):
+    """Stop a service (wait=false returns a job id immediately)"""
+    return await run_lifecycle_endpoint("stop", service_name, wait)
 
 
 @app.post("/api/service/{service_name}/restart")
-async def restart_service_endpoint(service_name: str):
-    """Restart a service"""
-    svc = next((s for s in SERVICES if s.name == service_name), None)
-    if not svc:
-        return {"success": False, "message": "Service not found"}
-    
-    stop_result = stop_service(svc)
-    time.sleep(0.5)
-    start_result = start_service(svc)
-    
-    runtime_tracker[svc.name].restart_count += 1
-    
-    await manager.broadcast({"type": "status_update", "data": get_all_statuses()})
-    
-    return {
-        "success": start_result["success"],
-        "message": f"Stopped: {stop_result.get('count', 0)} process(es), Started service"
-    }
+async def restart_service_endpoint(service_name: str, wait: bool = True):
+    """Restart a service (wait=false returns a job id immediately)"""
+    return await run_lifecycle_endpoint("restart", service_name, wait)
+
+
+@app.get("/api/jobs")
+async def list_jobs():
+    """List recent lifecycle jobs, newest first"""
+    return [job.to_dict() for job in reversed(jobs.jobs.values())]
+
+
+@app.get("/api/jobs/{job_id}")
+async def get_job(job_id: str, wait: bool = False):
+    """Poll a lifecycle job (wait=true blocks until it finishes)"""
+    job = jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if wait:
+        job = await jobs.wait(job_id)
+    return job.to_dict()
 
 
 @app.post("/api/service/{service_name}/scan-ports")
 async def scan_ports_endpoint(service_name: str):
     """Scan and update ports for a running service"""
-    svc = next((s for s in SERVICES if s.name == service_name), None)
+    svc = SERVICES.get(service_name)
     if not svc:
         return {"success": False, "message": "Service not found"}
     
-    detected_ports = scan_service_for_ports(svc)
+    detected_ports = scan_service_for_ports(svc, listeners=get_listener_index(refresh=True))
     
     return {
         "success": True,
@@ -949,17 +3381,25 @@ async def scan_ports_endpoint(service_name: str):
 
 
 @app.post("/api/bulk/stop/{kind}")
-async def stop_by_kind(kind: str):
-    """Stop all services of a specific kind"""
-    total = 0
-    for svc in SERVICES:
-        if svc.kind.lower() == kind.lower():
-            result = stop_service(svc)
-            total += result.get("count", 0)
+async def stop_by_kind(kind: str, stream: bool = False):
+    """Stop all services of a specific kind (stream=true streams NDJSON results)"""
+    services = SERVICES.by_kind(kind)
+    
+    if stream:
+        async def lines():
+            total = 0
+            async for item in bulk_stop(services):
+                total += item.get("count", 0)
+                yield json.dumps(item) + "\n"
+            await sampler.refresh()
+            yield json.dumps({"done": True, "success": True, "message": f"Stopped {total} process(es)", "count": total}) + "\n"
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
     
-    await manager.broadcast({"type": "status_update", "data": get_all_statuses()})
+    results = [item async for item in bulk_stop(services)]
+    total = sum(item.get("count", 0) for item in results)
+    await sampler.refresh()
     
-    return {"success": True, "message": f"Stopped {total} process(es)", "count": total}
+    return {"success": True, "message": f"Stopped {total} process(es)", "count": total, "results": results}
 
 
 @app.websocket("/ws")
@@ -968,31 +3408,23 @@ async def websocket_endpoint(websocket: WebSocket):
     await manager.connect(websocket)
     
     try:
-        await websocket.send_json({
-            "type": "status_update",
-            "data": get_all_statuses()
-        })
+        await sampler.ensure_fresh()
+        await manager.send(websocket, sampler.full_frame())
         
-        await websocket.send_json({
+        await manager.send(websocket, {
             "type": "system_stats",
-            "data": get_system_stats()
+            "data": sampler.stats
         })
         
+        # Periodic updates are pushed by the sampler through manager.broadcast;
+        # the only client message is a resync request after a sequence gap
         while True:
-            update_interval = SETTINGS.update_interval_seconds
-            await asyncio.sleep(update_interval)
             try:
-                await websocket.send_json({
-                    "type": "status_update",
-                    "data": get_all_statuses()
-                })
-                
-                await websocket.send_json({
-                    "type": "system_stats",
-                    "data": get_system_stats()
-                })
-            except:
-                break
+                message = json.loads(await websocket.receive_text())
+            except ValueError:
+                continue
+            if isinstance(message, dict) and message.get("type") == "resync":
+                await manager.send(websocket, sampler.full_frame())
                 
     except WebSocketDisconnect:
         manager.disconnect(websocket)